@@ -1,6 +1,7 @@
 import re, time, json, threading, requests, traceback, sys, importlib
 from datetime import datetime as dt
 import paho.mqtt.client as mqtt
+from mqtt_publisher import MQTTPublisher
 
 def df_func_name(df_name):
     return re.sub(r'-', r'_', df_name)
@@ -42,12 +43,6 @@ def on_message(client, userdata, msg):
     else:
         print('ODF function "{}" is not existed.'.format(ODF_name))
 
-def mqtt_pub(client, deviceId, IDF, data):
-    topic = '{}//{}'.format(deviceId, IDF)
-    sample = [str(dt.today()), data]
-    payload  = json.dumps({'samples':[sample]})
-    msg_info = client.publish(topic, payload)
-
 def on_publish(client, userdata, mid, reason_code, properties):
     if reason_code.is_failure:
         print(f"Failed to publish: {reason_code}.")
@@ -78,42 +73,59 @@ def MQTT_config(client, MQTT_broker, MQTT_port, MQTT_User, MQTT_PW, MQTT_encrypt
     if MQTT_encryption: client.tls_set()
     client.connect(MQTT_broker, MQTT_port, keepalive=60)
 
-mqttc_singlepush = None
+def make_publisher(client, device_id, start_loop):
+    # Queue sizes and coalescing are tunable from SA: MQTT_queue_size, MQTT_coalesce, MQTT_linger, MQTT_qos
+    return MQTTPublisher(client, device_id,
+                         max_queue=getattr(SA, 'MQTT_queue_size', 1000),
+                         coalesce=getattr(SA, 'MQTT_coalesce', 1),
+                         linger=getattr(SA, 'MQTT_linger', 0.0),
+                         qos=getattr(SA, 'MQTT_qos', 0),
+                         start_loop=start_loop).start()
+
+publisher = None    # MQTTPublisher for IDF samples: on the main connection, or push()'s own one
+publisher_lock = threading.Lock()
 def push(idf, IDF_data):
 #This function is intended to be used as a standalone module, so variables of MQTT info and device_id in global area cannot be used (because they are only created when __name__ == "__main__").
-    global mqttc_singlepush
+    global publisher
     MQTT_broker = getattr(SA,'MQTT_broker', None)
     if MQTT_broker:
-        MQTT_port = getattr(SA,'MQTT_port', 1883)
-        MQTT_User = getattr(SA,'MQTT_User', None)
-        MQTT_PW = getattr(SA,'MQTT_PW', None)
-        MQTT_encryption = getattr(SA,'MQTT_encryption', None)
-        device_id = getattr(SA,'device_id', None)
-        if device_id==None: device_id = DAN.get_mac_addr()
-        if not mqttc_singlepush:
-            mqttc_singlepush = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-            MQTT_config(mqttc_singlepush, MQTT_broker, MQTT_port, MQTT_User, MQTT_PW, MQTT_encryption)
+        with publisher_lock:
+            if not publisher:
+                MQTT_port = getattr(SA,'MQTT_port', 1883)
+                MQTT_User = getattr(SA,'MQTT_User', None)
+                MQTT_PW = getattr(SA,'MQTT_PW', None)
+                MQTT_encryption = getattr(SA,'MQTT_encryption', None)
+                device_id = getattr(SA,'device_id', None)
+                if device_id==None: device_id = DAN.get_mac_addr()
+                # publish-only client: no ODF subscriptions, paho's loop runs in the background
+                client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+                client.username_pw_set(MQTT_User, MQTT_PW)
+                client.on_publish = on_publish
+                if MQTT_encryption: client.tls_set()
+                client.connect_async(MQTT_broker, MQTT_port, keepalive=60)
+                publisher = make_publisher(client, device_id, start_loop=True)
         if type(IDF_data) is not tuple and type(IDF_data) is not list  : IDF_data=[IDF_data]
-        mqtt_pub(mqttc_singlepush, device_id, idf, IDF_data)
+        publisher.push(idf, IDF_data)
     else: 
         DAN.push(idf, IDF_data)
 
 def DF_function_handler(mqttc):
+    IDF_batch = {}
     for idf in IDF_list:
         if not IDF_funcs.get(idf): continue
         IDF_data = IDF_funcs.get(idf)()
         if IDF_data == None: continue
         if type(IDF_data) is not tuple: IDF_data=[IDF_data]
-        if MQTT_broker: mqtt_pub(mqttc, device_id, idf, IDF_data)
-        else: DAN.push(idf, IDF_data)
-        time.sleep(0.001)
-    if not MQTT_broker: 
-        for odf in ODF_list:
-            if not ODF_funcs.get(odf): continue
-            ODF_data = DAN.pull(odf)
-            if ODF_data == None: continue
-            ODF_funcs.get(odf)(ODF_data)
-            time.sleep(0.001)
+        if MQTT_broker: publisher.push(idf, IDF_data)
+        else: IDF_batch[idf] = IDF_data
+    if not MQTT_broker:
+        # One round trip for all features (or concurrent requests if the server has no batch API)
+        if IDF_batch: DAN.push_many(IDF_batch)
+        ODF_active = [odf for odf in ODF_list if ODF_funcs.get(odf)]
+        if ODF_active:
+            for odf, ODF_data in DAN.pull_many(ODF_active).items():
+                if ODF_data == None: continue
+                ODF_funcs.get(odf)(ODF_data)
 
 def reconnect(client):
     client.disconnect()
@@ -192,6 +204,7 @@ if __name__ == '__main__':
     if MQTT_broker:
         mqttc = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
         MQTT_config(mqttc, MQTT_broker, MQTT_port, MQTT_User, MQTT_PW, MQTT_encryption)
+        publisher = make_publisher(mqttc, device_id, start_loop=False)     # mqttc.loop_forever() below is its network loop
     
     sa_p = threading.Thread(target=on_register, args=(result,))
     sa_p.daemon = True
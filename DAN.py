@@ -1,6 +1,7 @@
 from datetime import datetime as dt
-import time, threading, requests
+import time, threading, random
 import csmapi
+from discovery import ECDiscovery
 
 # example
 profile = {
@@ -16,40 +17,50 @@ state = 'RESUME'
 
 SelectedDF = []
 iottalk_server_disconnect = None
+control_wait = 20.0             # long-poll: seconds the server may hold a __Ctl_O__ pull open
+control_poll_interval = 2.0     # shortest gap between control pulls that bring no new command
+                                # (servers without ETags, or that ignore ?wait and answer at once)
+control_backoff = (0.5, 10.0)   # first and longest retry delay after errors (exponential, full jitter)
+state_callbacks = []            # callback(state, SelectedDF), fired after every applied command
+control_timestamp = None
+control_lock = threading.Lock()
+reconnect_timeout = 2.0         # deadline for each server probe, beacon wait and resume
+reconnect_backoff = (0.2, 5.0)  # first and longest pause between failed attempts (exponential, full jitter)
+race_local_ec = True            # a local EasyConnect beacon may win the race against the configured URL
+registration = None             # last registration: mac, server, d_name, password (for resume)
+disconnected_at = None          # monotonic time the control channel first failed
+discovery_timeout = 5.0         # register_device without a server URL: longest wait for a local server
+local_ec = ECDiscovery()        # background EasyConnect beacon listener, shared by all lookups
+reconnect_stats = {'connects': 0, 'resumed': 0, 'attempts': 0, 'last': None, 'max': 0.0, 'total': 0.0}
+
+def handle_control(CH, UsingSession=csmapi.IoTtalk):
+    # Apply the newest __Ctl_O__ sample; called by ControlChannel or an MQTT subscription
+    return _device.handle_control(CH, UsingSession)
+
 def ControlChannel():
-    global state, SelectedDF, iottalk_server_disconnect
+    global iottalk_server_disconnect, disconnected_at
     print('[{}] Device state: {}'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'), state))
-    NewSession=requests.Session()
-    control_channel_timestamp = None
+    NewSession=csmapi.make_session(1)
+    etag = None
+    failures = 0
     while True:
-        time.sleep(2)
         try:
-            CH = csmapi.pull(MAC,'__Ctl_O__', NewSession)
-            if CH != []:
-                if control_channel_timestamp == CH[0][0]: continue
-                control_channel_timestamp = CH[0][0]
-                cmd = CH[0][1][0]
-                if cmd == 'RESUME':  
-                    print('[{}] Device state: RESUME.'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'))) 
-                    state = 'RESUME'
-                elif cmd == 'SUSPEND': 
-                    print('[{}] Device state: SUSPEND.'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'))) 
-                    state = 'SUSPEND'
-                elif cmd == 'SET_DF_STATUS':
-                    csmapi.push(MAC,'__Ctl_I__',['SET_DF_STATUS_RSP',{'cmd_params':CH[0][1][1]['cmd_params']}], NewSession)
-                    DF_STATUS = list(CH[0][1][1]['cmd_params'][0])
-                    SelectedDF = []
-                    index=0            
-                    profile['df_list'] = csmapi.pull(MAC, 'profile')['df_list']              #new
-                    for STATUS in DF_STATUS:
-                        if STATUS == '1':
-                            SelectedDF.append(profile['df_list'][index])
-                        index=index+1
+            # Long-poll: returns as soon as a new command arrives (or after control_wait)
+            start, sent = time.monotonic(), etag
+            CH, etag = csmapi.pull_if_changed(MAC, '__Ctl_O__', etag, control_wait, NewSession)
             iottalk_server_disconnect = False
+            disconnected_at = None
+            failures = 0
+            if CH is not None and handle_control(CH, NewSession): continue
+            if sent is None and etag is not None: continue     # first ETag: the next pull can wait
+            # Nothing new: if the server did not hold the pull open, pause before the next one
+            time.sleep(max(0.0, control_poll_interval - (time.monotonic() - start)))
         except Exception as e:
             print ('[{}] Control CH err: {}'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'), e))
             iottalk_server_disconnect = True
-            time.sleep(10)            
+            if disconnected_at is None: disconnected_at = time.monotonic()
+            failures += 1
+            time.sleep(random.uniform(0, min(control_backoff[1], control_backoff[0] * 2 ** failures)))
 
 def get_mac_addr():
     from uuid import getnode
@@ -57,32 +68,37 @@ def get_mac_addr():
     mac = ''.join(("%012X" % mac)[i:i+2] for i in range(0, 12, 2))
     return mac
 
-def detect_local_ec():
-    EASYCONNECT_HOST=None
-    import socket
-    UDP_IP = ''
-    UDP_PORT = 17000
-    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind((UDP_IP, UDP_PORT))
-    while EASYCONNECT_HOST==None:
-        print ('Searching for the IoTtalk server...')
-        data, addr = s.recvfrom(1024)
-        if str(data.decode()) == 'easyconnect':
-            EASYCONNECT_HOST = 'http://{}:9999'.format(addr[0])
-            csmapi.ENDPOINT=EASYCONNECT_HOST
-            #print('IoTtalk server = {}'.format(csmapi.ENDPOINT))
+def detect_local_ec(timeout=None):
+    # Listen for EasyConnect beacons in the background and use the fastest local server
+    # that answers within timeout (default discovery_timeout); raises CSMError if none does
+    timeout = discovery_timeout if timeout is None else timeout
+    print ('Searching for the IoTtalk server...')
+    server = local_ec.start(timeout).best(timeout=timeout)
+    if server is None:
+        raise csmapi.CSMError('no local IoTtalk server found within {}s{}'.format(
+            timeout, ' ({})'.format(local_ec.error) if local_ec.error else ''))
+    csmapi.ENDPOINT = server
+    #print('IoTtalk server = {}'.format(csmapi.ENDPOINT))
+    return server
 
 timestamp={}
 MAC=get_mac_addr()
 thx=None
+pull_observer = None    # optional callback(FEATURE_NAME, data) for every new sample, e.g. a recorder
+pull_mode = 'full'      # 'full': fetch every time | 'conditional': If-None-Match, unchanged samples are not resent
+                        # 'long_poll': conditional, and the server holds the request until a newer sample arrives
+long_poll_wait = 1.0    # seconds a long poll may block
+etag={}
 def register_device(addr):
-    global MAC, profile, timestamp, thx
+    global MAC, profile, timestamp, thx, registration
     if csmapi.ENDPOINT == None: detect_local_ec()
     if addr != None: MAC = addr
 
     for i in profile['df_list']: timestamp[i] = ''
+    etag.clear()
+    csmapi.BATCH = None     # probe the (possibly new) server for batch support again
     profile['d_name'] = csmapi.register(MAC,profile)
+    registration = {'mac': MAC, 'server': csmapi.ENDPOINT, 'd_name': profile['d_name'], 'password': csmapi.passwordKey}
          
     if thx == None:
         print ('[{}] Create control threading'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S')))
@@ -96,42 +112,78 @@ def register_device(addr):
     return result
 
 
+def find_server(URL=None):
+    # Race the configured / last used server against local EasyConnect servers (cached or
+    # beaconing meanwhile), bounded by reconnect_timeout; returns the first URL that answers, or None
+    urls = [u for u in (URL, registration and registration['server'], csmapi.ENDPOINT) if u]
+    local = race_local_ec or not urls
+    if local: local_ec.start(reconnect_timeout)
+    return local_ec.best(urls, reconnect_timeout, local)
+
+def reconnect(URL=None, addr=None):
+    # One attempt: find a server, resume the cached registration there if it is still valid, else register
+    global MAC
+    server = find_server(URL)
+    if server is None: raise csmapi.CSMError('no IoTtalk server answered within {}s'.format(reconnect_timeout))
+    csmapi.ENDPOINT = server
+    if addr != None: MAC = addr
+    if registration and registration['mac'] == MAC and registration['server'] == server:
+        try:
+            csmapi.resume(MAC, registration['password'], timeout=reconnect_timeout)
+        except csmapi.CSMError as e:
+            if e.status_code is None: raise
+            print ('[{}] Resume rejected ({}), registering again'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'), e.status_code))
+        else:
+            profile['d_name'] = registration['d_name']
+            return {'d_name': registration['d_name'], 'server': server, 'resumed': True}
+    result = register_device(addr)
+    result['resumed'] = False
+    return result
+
 def device_registration_with_retry(URL=None, addr=None):
-    global iottalk_server_disconnect
-    if URL != None:
-        csmapi.ENDPOINT = URL
-    success = False
-    while not success:
+    global iottalk_server_disconnect, disconnected_at
+    start = disconnected_at or time.monotonic()
+    failures = 0
+    while True:
+        reconnect_stats['attempts'] += 1
         try:
-            result = register_device(addr)
-            success = True
-            iottalk_server_disconnect = False
+            result = reconnect(URL, addr)
             break
         except Exception as e:
-            print ('Attach failed: {}'.format(e)),
-        time.sleep(1)
+            print ('Attach failed: {}'.format(e))
+        failures += 1
+        time.sleep(random.uniform(0, min(reconnect_backoff[1], reconnect_backoff[0] * 2 ** failures)))
+    iottalk_server_disconnect = False
+    disconnected_at = None
+
+    # time-to-reconnect, counted from the first control channel failure when there was one
+    elapsed = time.monotonic() - start
+    reconnect_stats['connects'] += 1
+    reconnect_stats['resumed'] += result['resumed']
+    reconnect_stats['last'] = elapsed
+    reconnect_stats['max'] = max(reconnect_stats['max'], elapsed)
+    reconnect_stats['total'] += elapsed
+    print ('[{}] Attached to {} in {:.2f}s ({})'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'),
+           result['server'], elapsed, 'resumed' if result['resumed'] else 'registered'))
     return result
 
 def pull(FEATURE_NAME):
-    global timestamp
-
-    if state == 'RESUME': data = csmapi.pull(MAC,FEATURE_NAME)
-    else: data = []
-        
-    if data != []:
-        if timestamp[FEATURE_NAME] == data[0][0]:
-            return None
-        timestamp[FEATURE_NAME] = data[0][0]
-        if data[0][1] != []:
-            return data[0][1]
-        else: return None
-    else:
-        return None
+    return _device.pull(FEATURE_NAME, long_poll_wait if pull_mode == 'long_poll' else 0)
+
+def new_sample(FEATURE_NAME, data):
+    # Newest sample's data if it was not seen before, else None
+    return _device.new_sample(FEATURE_NAME, data)
+
+def pull_many(FEATURE_NAMES):
+    # {FEATURE_NAME: data or None} for all features in one round trip
+    return _device.pull_many(FEATURE_NAMES)
 
 def push(FEATURE_NAME, data):
-    if state == 'RESUME':
-        return csmapi.push(MAC, FEATURE_NAME, data)
-    else: return None
+    return _device.push(FEATURE_NAME, data)
+
+def push_many(DATA):
+    # DATA = {FEATURE_NAME: data}, sent in one round trip
+    return _device.push_many(DATA)
 
 def get_alias(FEATURE_NAME):
     try:
@@ -153,4 +205,140 @@ def set_alias(FEATURE_NAME, alias):
 
 		
 def deregister():
-    return csmapi.deregister(MAC)
+    return _device.deregister()
+
+
+class DeviceSession:
+    # One IoTtalk device with its own MAC, profile, timestamps, state and SelectedDF,
+    # so one process can be many devices (see hub.py). The functions above are the
+    # single-device API: they run this class on the module globals (_ModuleDevice).
+    verbose = False                 # print state changes
+    def __init__(self, profile, mac=None, UsingSession=csmapi.IoTtalk):
+        self.profile = dict(profile)
+        self.MAC = mac if mac != None else get_mac_addr()
+        self.UsingSession = UsingSession
+        self.password = None
+        self.timestamp = {}
+        self.etag = {}
+        self.state = 'RESUME'
+        self.SelectedDF = []
+        self.control_timestamp = None
+        self.state_callbacks = []   # callback(session, state, SelectedDF)
+        self.pull_observer = None   # callback(session, FEATURE_NAME, data)
+        self.pull_mode = 'conditional'  # or 'full': fetch the newest sample every time
+        self.lock = threading.Lock()
+
+    def register(self, timeout=None):
+        self.profile['d_name'], self.password = csmapi.attach(self.MAC, self.profile, self.UsingSession, timeout)
+        self.timestamp = {df: '' for df in self.profile['df_list']}
+        self.etag.clear()
+        return {'d_name': self.profile['d_name'], 'server': csmapi.ENDPOINT}
+
+    def resume(self):
+        # Still registered with our password? Returns the profile, raises CSMError (with status_code) if not
+        return csmapi.pull(self.MAC, 'profile', self.UsingSession, self.password)
+
+    def deregister(self):
+        return csmapi.deregister(self.MAC, self.UsingSession)
+
+    def push(self, FEATURE_NAME, data):
+        if self.state != 'RESUME': return None
+        return csmapi.push(self.MAC, FEATURE_NAME, data, self.UsingSession, self.password)
+
+    def push_many(self, DATA):
+        if self.state != 'RESUME': return None
+        return csmapi.push_many(self.MAC, DATA, self.UsingSession, self.password)
+
+    def pull(self, FEATURE_NAME, wait=0):
+        # Newest unseen data, or None; conditional unless pull_mode is 'full' (wait > 0 long-polls)
+        if self.state != 'RESUME': return None
+        if self.pull_mode == 'full':
+            data = csmapi.pull(self.MAC, FEATURE_NAME, self.UsingSession, self.password)
+        else:
+            data, self.etag[FEATURE_NAME] = csmapi.pull_if_changed(self.MAC, FEATURE_NAME, self.etag.get(FEATURE_NAME),
+                                                                   wait, self.UsingSession, self.password)
+            if data is None: return None
+        return self.new_sample(FEATURE_NAME, data)
+
+    def pull_many(self, FEATURE_NAMES):
+        if self.state != 'RESUME': return {f: None for f in FEATURE_NAMES}
+        samples = csmapi.pull_many(self.MAC, FEATURE_NAMES, self.UsingSession, self.password)
+        return {f: self.new_sample(f, samples.get(f, [])) for f in FEATURE_NAMES}
+
+    def new_sample(self, FEATURE_NAME, data):
+        if data == [] or self.timestamp.get(FEATURE_NAME) == data[0][0]: return None
+        self.timestamp[FEATURE_NAME] = data[0][0]
+        if data[0][1] == []: return None
+        self._observe(FEATURE_NAME, data[0][1])
+        return data[0][1]
+
+    def _observe(self, FEATURE_NAME, data):
+        if self.pull_observer: self.pull_observer(self, FEATURE_NAME, data)
+
+    def poll_control(self, wait=0):
+        # One conditional pull of __Ctl_O__; True if a new command was applied
+        CH, self.etag['__Ctl_O__'] = csmapi.pull_if_changed(self.MAC, '__Ctl_O__', self.etag.get('__Ctl_O__'),
+                                                            wait, self.UsingSession, self.password)
+        return CH is not None and self.handle_control(CH)
+
+    def handle_control(self, CH, UsingSession=None):
+        # Apply the newest __Ctl_O__ sample; True if it was a new, known command
+        with self.lock:
+            if CH == [] or self.control_timestamp == CH[0][0]: return False
+            self.control_timestamp = CH[0][0]
+            cmd = CH[0][1][0]
+            if cmd == 'RESUME' or cmd == 'SUSPEND':
+                if self.verbose: print('[{}] Device state: {}.'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'), cmd))
+                self.state = cmd
+            elif cmd == 'SET_DF_STATUS':
+                csmapi.push(self.MAC, '__Ctl_I__', ['SET_DF_STATUS_RSP', {'cmd_params': CH[0][1][1]['cmd_params']}],
+                            UsingSession or self.UsingSession, self.password)
+                DF_STATUS = list(CH[0][1][1]['cmd_params'][0])
+                # profile['df_list'] is what we registered, no need to pull it back from the server
+                self.SelectedDF = [df for df, STATUS in zip(self.profile['df_list'], DF_STATUS) if STATUS == '1']
+            else: return False
+            current = self.state, list(self.SelectedDF)
+        self._notify(current)
+        return True
+
+    def _notify(self, current):
+        for callback in self.state_callbacks:
+            try: callback(self, *current)
+            except Exception as e: print('[{}] State callback err ({}): {}'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'), self.MAC, e))
+
+
+def _module_global(name):
+    # property backed by one of this module's globals
+    return property(lambda self: globals()[name], lambda self, value: globals().__setitem__(name, value))
+
+class _ModuleDevice(DeviceSession):
+    # The device behind the module-level functions: its state is the module globals, its
+    # password csmapi's passwordKey, and observers / callbacks get no session argument
+    MAC = _module_global('MAC')
+    profile = _module_global('profile')
+    timestamp = _module_global('timestamp')
+    etag = _module_global('etag')
+    state = _module_global('state')
+    SelectedDF = _module_global('SelectedDF')
+    control_timestamp = _module_global('control_timestamp')
+    lock = _module_global('control_lock')
+    UsingSession = property(lambda self: csmapi.IoTtalk)
+    password = None
+    verbose = True
+
+    def __init__(self):
+        pass
+
+    @property
+    def pull_mode(self):
+        return 'full' if pull_mode == 'full' else 'conditional'
+
+    def _observe(self, FEATURE_NAME, data):
+        if pull_observer: pull_observer(FEATURE_NAME, data)
+
+    def _notify(self, current):
+        for callback in state_callbacks:
+            try: callback(*current)
+            except Exception as e: print('[{}] State callback err: {}'.format(dt.now().strftime('%Y-%m-%d %H:%M:%S'), e))
+
+_device = _ModuleDevice()
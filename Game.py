@@ -3,12 +3,41 @@ import random
 import threading
 import time
 import math
+import json
 import DAN
+from particles import ParticleSystem
+import spatial
+from starfield import Starfield
+from pools import ObjectPool
+from profiler import FrameProfiler, NULL_PROFILER
+from tilt_record import TiltRecorder, TiltPlayback
+from input_channel import InputChannel
+from tilt_filter import make_filter
+from calibration import TiltParams, OnlineCalibrator, CalibrationStore
+import paho.mqtt.client as mqtt
 
 # --- IoTtalk Settings ---
 ServerURL = 'https://class.iottalk.tw'
 Reg_addr = None  # None = 使用 MAC address
 
+# MQTT 推送模式（與 SA.py / DAI.py 相同的 Broker 設定）
+# MQTT_broker = None 時只使用 HTTP polling
+MQTT_broker = 'iot.iottalk.tw'
+MQTT_port = 8883
+MQTT_encryption = True
+MQTT_User = 'iottalk'
+MQTT_PW = 'iottalk2023'
+
+# HTTP polling 備援的拉取模式（見 DAN.pull_mode / bench_pull.py）
+# 'conditional'：資料沒變時伺服器只回 304，不重送整包 JSON；不支援的伺服器照常回 200
+# 'long_poll'：伺服器等到有新樣本才回應（需伺服器支援，例如 mock_csm.py）
+HTTP_PULL_MODE = 'conditional'
+
+# 傾斜數據錄製 / 重播（二進位格式，見 tilt_record.py）
+TILT_RECORD = None  # 例如 'session.tilt'：把收到的每筆 Gyroscope 數據錄下來
+TILT_REPLAY = None  # 例如 'session.tilt'：不連 IoTtalk，改用錄好的數據控制飛機
+TILT_REPLAY_SPEED = 1.0  # 重播速度倍率（None = 盡可能快）
+
 # 註冊裝置
 DAN.profile = {
     'd_name': 'Sky_Fighter',
@@ -17,11 +46,178 @@ DAN.profile = {
     'df_list': ['Dummy_Control'],
 }
 
+# 傾斜濾波與延遲補償（見 tilt_filter.py / bench_tilt_filter.py）
+TILT_FILTER = 'kalman'  # 'none' | 'ema' | 'one_euro' | 'kalman'
+TILT_PREDICT_LEAD = 0.05  # 額外往前預測的秒數（約為單程網路延遲）
+TILT_PREDICT_MAX = 0.15  # 最長預測時間；樣本更舊時只保持濾波後的值
+
+# 監聽執行緒（producer）把轉換後的傾斜值推進 tilt_channel；
+# current_tilt 只由遊戲執行緒（consumer）在每幀 read_tilt() 時更新
+tilt_channel = InputChannel(capacity=256, stale_after=0.5)
+tilt_filter = make_filter(TILT_FILTER, max_horizon=TILT_PREDICT_MAX)
+
+# 自動校正（取代離線的 test_tilt_data.py 流程，見 calibration.py）
+# 主選單期間收集原始 Gamma 值，估計基準值 / 死區 / 縮放因子，依裝置 ID 存檔
+AUTO_CALIBRATE = True
+CALIBRATION_FILE = 'calibration.json'
+# 根據測試結果（2025-11-13，延長測試版）的預設值，校正完成前使用
+DEFAULT_TILT_PARAMS = TiltParams(baseline=-0.88, dead_zone=1.3, scale_factor=0.77)
+tilt_params = DEFAULT_TILT_PARAMS
+calibrator = OnlineCalibrator(DEFAULT_TILT_PARAMS)
+calibration_store = CalibrationStore(CALIBRATION_FILE)
 current_tilt = 0.0
+mqtt_link = threading.Event()  # set = MQTT 已連線，HTTP polling 暫停
+tilt_recorder = None
+
+# --- Tilt Mapping ---
+def parse_gamma(data):
+    # 處理 Gyroscope 數據格式：[[alpha, beta, gamma]]
+    if not isinstance(data, (list, tuple)) or len(data) < 1:
+        return None
+    # 數據可能是嵌套列表：[[alpha, beta, gamma]]
+    val = data[0]
+    try:
+        if isinstance(val, (list, tuple)) and len(val) >= 3:
+            # 提取 Gamma 值（索引 2，用於左右傾斜控制）
+            return float(val[2])
+        elif isinstance(val, (list, tuple)) and len(val) >= 1:
+            # 如果只有一個值，可能是單一 Gamma
+            return float(val[0])
+        else:
+            # 直接是數值
+            return float(val)
+    except (ValueError, TypeError, IndexError):
+        return None
+
+def map_tilt(data):
+    gamma_value = parse_gamma(data)
+    if gamma_value is None:
+        return 0.0
+    return map_gamma(gamma_value, tilt_params)
+
+def map_gamma(gamma_value, params):
+    # 控制邏輯：
+    # offset = gamma_value - baseline
+    # offset > 0 → 向右移動
+    # offset < 0 → 向左移動
+    offset = gamma_value - params.baseline
+
+    # 死區（dead zone）過濾小幅震動
+    if abs(offset) < params.dead_zone:
+        return 0.0
+    # 縮放因子：將偏移值映射到 -10 到 10 的範圍
+    return max(-10, min(10, offset * params.scale_factor))
+
+def update_tilt(data):
+    # Producer 端：由 MQTT / HTTP polling / 重播執行緒呼叫
+    if calibrator.active:
+        gamma_value = parse_gamma(data)
+        if gamma_value is not None:
+            calibrator.add(gamma_value)
+    tilt_channel.push(map_tilt(data))
+
+# --- Calibration ---
+def calibration_device_id():
+    return Reg_addr or DAN.MAC
+
+def load_calibration():
+    # 已校正過的裝置直接套用存檔，不再進行校正
+    global tilt_params
+    if not AUTO_CALIBRATE:
+        return
+    saved = calibration_store.load(calibration_device_id())
+    if saved:
+        tilt_params = saved
+        print(f"🎯 載入校正: baseline={saved.baseline:.2f} dead_zone={saved.dead_zone:.2f} scale={saved.scale_factor:.3f}")
+    else:
+        start_calibration()
+
+def start_calibration():
+    calibrator.reset()
+    calibrator.active = True
+
+def update_calibration():
+    # 遊戲執行緒每幀呼叫：樣本足夠後即時套用估計值，讓預覽飛機立刻反應
+    global tilt_params
+    if not calibrator.active:
+        return
+    estimate = calibrator.estimate()
+    if estimate:
+        tilt_params = estimate
+
+def finish_calibration():
+    # 離開主選單時停止收集；只有資料足夠（有傾斜到兩側）才存檔
+    calibrator.active = False
+    if calibrator.ready():
+        calibration_store.save(calibration_device_id(), tilt_params, calibrator.samples)
+        print(f"💾 校正已儲存: baseline={tilt_params.baseline:.2f} dead_zone={tilt_params.dead_zone:.2f} scale={tilt_params.scale_factor:.3f}")
+
+def read_tilt():
+    # Consumer 端：遊戲執行緒每幀呼叫一次，回傳上一幀之後到達的 (timestamp, tilt)
+    # 樣本送進濾波器，再依樣本的年齡往前預測，補償網路延遲
+    global current_tilt
+    samples = tilt_channel.drain()
+    for t, value in samples:
+        tilt_filter.update(t, value)
+    if tilt_filter.t is not None:
+        predicted = tilt_filter.predict(tilt_channel.clock() + TILT_PREDICT_LEAD)
+        current_tilt = max(-10, min(10, predicted))
+    return samples
+
+# --- MQTT Subscriber ---
+# 與 DAI.py 相同的 on_connect / on_message 接法：樣本到達時立即推進 tilt_channel
+def on_mqtt_connect(client, userdata, flags, reason_code, properties):
+    if reason_code.is_failure:
+        print(f"⚠️ MQTT 連線失敗: {reason_code}，改用 HTTP polling")
+        return
+    # 控制通道也走 MQTT（伺服器有推送時），RESUME / SUSPEND 立即生效；HTTP long-poll 為備援
+    client.subscribe([('{}//{}'.format(userdata, 'Dummy_Control'), 0),
+                      ('{}//{}'.format(userdata, '__Ctl_O__'), 0)])
+    mqtt_link.set()
+    print(f"📡 MQTT 推送模式已啟用: {MQTT_broker}")
+
+def on_mqtt_disconnect(client, userdata, disconnect_flags, reason_code, properties):
+    mqtt_link.clear()
+    print("⚠️ MQTT 已斷線，改用 HTTP polling")
+
+def on_mqtt_message(client, userdata, msg):
+    try:
+        samples = json.loads(msg.payload)
+        if msg.topic.endswith('//__Ctl_O__'):
+            DAN.handle_control(samples['samples'])
+            return
+        if DAN.state != 'RESUME': return  # 與 HTTP 路徑一致：SUSPEND 時忽略輸入
+        data = samples['samples'][0][1]
+        if tilt_recorder: tilt_recorder.observe('Dummy_Control', data)
+        update_tilt(data)
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        print(f"⚠️ MQTT 數據錯誤: {e}")
+
+def start_mqtt_subscriber(device_id):
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, userdata=device_id)
+    client.username_pw_set(MQTT_User, MQTT_PW)
+    client.on_connect = on_mqtt_connect
+    client.on_disconnect = on_mqtt_disconnect
+    client.on_message = on_mqtt_message
+    if MQTT_encryption: client.tls_set()
+    client.connect_async(MQTT_broker, MQTT_port, keepalive=60)
+    client.loop_start()  # paho 網路執行緒，斷線時自動重連
+    return client
+
+def close_recorder():
+    # 結束前關閉錄製檔，把緩衝中的樣本寫入磁碟
+    if tilt_recorder: tilt_recorder.close()
 
 # --- IoTtalk Listener ---
 def iottalk_listener():
-    global current_tilt
+    global tilt_recorder
+    if TILT_RECORD:
+        # HTTP 路徑經由 DAN.pull_observer 錄製，MQTT 路徑在 on_mqtt_message 錄製
+        tilt_recorder = TiltRecorder(TILT_RECORD)
+        DAN.pull_observer = tilt_recorder.observe
+        print(f"⏺️ 錄製傾斜數據到 {TILT_RECORD}")
+    if MQTT_broker: DAN.profile['mqtt_enable'] = True
+    DAN.pull_mode = HTTP_PULL_MODE
     DAN.device_registration_with_retry(ServerURL, Reg_addr)
     print("=" * 50)
     print("✅ IoTtalk 連線成功！")
@@ -29,76 +225,46 @@ def iottalk_listener():
     print("   Smartphone (Gyroscope) -> Dummy_Device (Dummy_Control)")
     print("=" * 50)
 
+    if MQTT_broker:
+        start_mqtt_subscriber(DAN.MAC)
+
+    # HTTP polling 只在 MQTT 未連線時作為備援
     while True:
+        if DAN.iottalk_server_disconnect:
+            # 控制通道偵測到斷線：先嘗試沿用原本的註冊（resume），不行才重新註冊
+            DAN.device_registration_with_retry(ServerURL, Reg_addr)
+        if mqtt_link.is_set():
+            time.sleep(0.2)
+            continue
         try:
             data = DAN.pull('Dummy_Control')
             if data is not None:
-                gamma_value = None
-                
-                # 處理 Gyroscope 數據格式：[[alpha, beta, gamma]]
-                if isinstance(data, (list, tuple)):
-                    if len(data) >= 1:
-                        # 數據可能是嵌套列表：[[alpha, beta, gamma]]
-                        val = data[0]
-                        if isinstance(val, (list, tuple)) and len(val) >= 3:
-                            # 提取 Gamma 值（索引 2，用於左右傾斜控制）
-                            try:
-                                gamma_value = float(val[2])
-                            except (ValueError, TypeError, IndexError):
-                                pass
-                        elif isinstance(val, (list, tuple)) and len(val) >= 1:
-                            # 如果只有一個值，可能是單一 Gamma
-                            try:
-                                gamma_value = float(val[0])
-                            except (ValueError, TypeError):
-                                pass
-                        else:
-                            # 直接是數值
-                            try:
-                                gamma_value = float(val)
-                            except (ValueError, TypeError):
-                                pass
-                
-                if gamma_value is not None:
-                    # 根據測試結果（2025-11-13，延長測試版）：
-                    # 中間點（基準值）: -0.8833
-                    # 極右平均值: 1.5842（向右傾斜到極限）
-                    # 極左平均值: 0.5333（向左傾斜到極限）
-                    # Gamma 範圍: -24.5 到 22.1
-                    # 
-                    # 控制邏輯：
-                    # offset = gamma_value - baseline
-                    # offset > 0 → 向右移動
-                    # offset < 0 → 向左移動
-                    
-                    # 基準值（水平時的平均值）
-                    baseline = -0.88
-                    
-                    # 計算偏移
-                    offset = gamma_value - baseline
-                    
-                    # 設置死區（dead zone）來過濾小幅震動
-                    dead_zone = 1.3  # 根據測試建議設定
-                    
-                    if abs(offset) < dead_zone:
-                        current_tilt = 0.0
-                    else:
-                        # 縮放因子：將偏移值映射到 -10 到 10 的範圍
-                        # 根據測試建議：scale_factor = 0.7702
-                        scale_factor = 0.77  # 約 0.77
-                        current_tilt = offset * scale_factor
-                        # 限制在 -10 到 10 之間
-                        current_tilt = max(-10, min(10, current_tilt))
-                else:
-                    current_tilt = 0.0
+                update_tilt(data)
             time.sleep(0.02)  # 50Hz 更新率
         except Exception as e:
             print(f"⚠️ 連線錯誤: {e}")
+            if 'mac_addr not found' in str(e):
+                DAN.iottalk_server_disconnect = True  # 伺服器已忘記這個裝置
             time.sleep(1)
 
+def replay_listener():
+    # 以錄製時的節奏（或加速）重播傾斜數據，循環播放
+    with TiltPlayback(TILT_REPLAY) as playback:
+        print(f"▶️ 重播 {TILT_REPLAY}：{len(playback)} 筆，{playback.duration:.1f} 秒")
+        playback.play(update_tilt, TILT_REPLAY_SPEED, loop=True)
+
 # --- Game Constants & Colors ---
 WIDTH, HEIGHT = 800, 600
-FPS = 60
+FPS = 60  # 渲染幀率上限
+PHYSICS_HZ = 120  # 固定模擬頻率，與渲染幀率無關
+STEP = 1.0 / PHYSICS_HZ
+MAX_CATCHUP_STEPS = 8  # 單幀最多補跑的模擬步數
+SHOT_INTERVAL = 0.2  # 自動射擊間隔（秒）
+PROFILE_OVERLAY = False  # 啟動時顯示效能面板（遊戲中按 F3 切換）
+PROFILE_DUMP = None  # 例如 'frame_times.csv' 或 'frame_times.json'，遊戲結束時寫出每幀耗時
+DIRTY_RENDERING = False  # True = 只更新變動區域（軟體渲染的機台較快）
+MAX_PARTICLES = 2000  # 粒子數量上限，超過時新粒子會被丟棄
+STAR_COUNT = 50  # 背景星星數量，大螢幕可調高到數千
 
 # Neon Palette
 C_BG = (10, 10, 20)
@@ -109,165 +275,365 @@ C_NEON_YELLOW = (255, 240, 31)
 C_WHITE = (255, 255, 255)
 C_HUD_BG = (0, 0, 0, 180)
 
-# --- Visual Effects Classes ---
+# --- Sprite Cache ---
+# 所有造型在啟動時預先繪製一次，遊戲迴圈只做 blit
 
-class Particle(pygame.sprite.Sprite):
-    def __init__(self, x, y, color, speed_x, speed_y, life):
-        super().__init__()
-        self.original_life = life
-        self.life = life
-        self.image = pygame.Surface((4, 4), pygame.SRCALPHA)
-        self.image.fill(color)
-        self.rect = self.image.get_rect(center=(x, y))
-        self.vx = speed_x
-        self.vy = speed_y
-        self.color = color
-
-    def update(self):
-        self.rect.x += self.vx
-        self.rect.y += self.vy
-        self.life -= 1
-        if self.life <= 0:
-            self.kill()
-        else:
-            # Fade out effect
-            alpha = int((self.life / self.original_life) * 255)
-            self.image.set_alpha(alpha)
+PLAYER_SIZE = (50, 60)
+PLAYER_BANK_LIMIT = 25
+ENEMY_SIZES = range(30, 46)
+ENEMY_COLORS = (C_NEON_PINK, C_NEON_YELLOW)
+ENEMY_ROT_STEP = 3  # rot_speed 為 ±3
+ENEMY_SYMMETRY = 60  # 六邊形每 60 度重複，只需 20 個旋轉畫格
 
-class Star:
+class SpriteCache:
     def __init__(self):
-        self.x = random.randint(0, WIDTH)
-        self.y = random.randint(0, HEIGHT)
-        self.speed = random.uniform(0.5, 3.0)  # Parallax speed
-        self.size = int(self.speed)
-        self.color = random.choice([C_WHITE, C_NEON_CYAN, (100, 100, 255)])
+        self.player = {}
+        self.enemy = {}
+        self.bullet = None
+
+    def build(self):
+        ship = self._draw_ship()
+        # bank_angle 以 ±2 步進並在 ±25 處截斷，所以奇數角度也會出現
+        for angle in range(-PLAYER_BANK_LIMIT, PLAYER_BANK_LIMIT + 1):
+            self.player[angle] = self._prepare(pygame.transform.rotate(ship, -angle * 2))  # Multiply for effect
+        for size in ENEMY_SIZES:
+            for color in ENEMY_COLORS:
+                for rotation in range(0, ENEMY_SYMMETRY, ENEMY_ROT_STEP):
+                    self.enemy[(size, color, rotation)] = self._prepare(self._draw_enemy(size, color, rotation))
+        self.bullet = self._prepare(self._draw_bullet())
+        return self
+
+    def player_frame(self, angle):
+        return self.player[max(-PLAYER_BANK_LIMIT, min(PLAYER_BANK_LIMIT, int(angle)))]
+
+    def enemy_frame(self, size, color, rotation):
+        rotation = int(rotation) // ENEMY_ROT_STEP * ENEMY_ROT_STEP
+        return self.enemy[(size, color, rotation % ENEMY_SYMMETRY)]
+
+    @staticmethod
+    def _prepare(surf):
+        # convert_alpha 需要已建立的視窗；無視窗時保留原本的 SRCALPHA Surface
+        if pygame.display.get_surface() is not None:
+            return surf.convert_alpha()
+        return surf
+
+    @staticmethod
+    def _draw_ship():
+        surf = pygame.Surface(PLAYER_SIZE, pygame.SRCALPHA)
+        # Draw Neon Ship (Triangle based)
+        points = [(25, 0), (50, 60), (25, 45), (0, 60)]
+        pygame.draw.polygon(surf, C_NEON_CYAN, points, 2)  # Outline
+        pygame.draw.polygon(surf, (0, 100, 100), points)  # Fill
+        # Engine glow
+        pygame.draw.circle(surf, C_NEON_PINK, (25, 50), 5)
+        return surf
 
-    def update(self):
-        self.y += self.speed
-        if self.y > HEIGHT:
-            self.y = 0
-            self.x = random.randint(0, WIDTH)
+    @staticmethod
+    def _draw_enemy(size, color, rotation):
+        surf = pygame.Surface((size, size), pygame.SRCALPHA)
+        center = size // 2
+        # Abstract Hexagon/Shape
+        radius = size // 2 - 2
+        points = []
+        for i in range(6):
+            ang_rad = math.radians(rotation + i * 60)
+            px = center + radius * math.cos(ang_rad)
+            py = center + radius * math.sin(ang_rad)
+            points.append((px, py))
+        pygame.draw.polygon(surf, color, points, 2)
+        pygame.draw.circle(surf, C_WHITE, (center, center), 4)
+        return surf
 
-    def draw(self, screen):
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.size)
+    @staticmethod
+    def _draw_bullet():
+        surf = pygame.Surface((6, 20), pygame.SRCALPHA)
+        pygame.draw.rect(surf, C_NEON_GREEN, (0, 0, 6, 20), border_radius=3)
+        pygame.draw.rect(surf, C_WHITE, (2, 2, 2, 16), border_radius=1)  # Core
+        return surf
+
+_sprite_cache = None
+
+def get_sprite_cache():
+    global _sprite_cache
+    if _sprite_cache is None:
+        _sprite_cache = SpriteCache().build()
+    return _sprite_cache
 
 # --- Game Object Classes ---
 
-class Player(pygame.sprite.Sprite):
+class Body(pygame.sprite.Sprite):
+    # 以浮點數位置模擬；rect 跟隨 pos，繪製時在 prev_pos 與 pos 之間插值
+    def __init__(self):
+        super().__init__()
+        self.pos = pygame.Vector2()
+        self.prev_pos = pygame.Vector2()
+        self.pool = None  # 由 ObjectPool 建立時會設定
+
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)  # 回收到物件池，之後以 reset() 重用
+
+    def place(self, x, y):
+        # 瞬移：同時重設 prev_pos，避免插值拉出殘影
+        self.pos.update(x, y)
+        self.prev_pos.update(x, y)
+        self.sync_rect()
+
+    def begin_step(self):
+        self.prev_pos.update(self.pos)
+
+    def sync_rect(self):
+        self.rect.center = (round(self.pos.x), round(self.pos.y))
+
+    def draw_pos(self, alpha):
+        return self.prev_pos.lerp(self.pos, alpha)
+
+class Player(Body):
     def __init__(self):
         super().__init__()
-        self.width = 50
-        self.height = 60
-        self.image = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        self.rect = self.image.get_rect(center=(WIDTH // 2, HEIGHT - 80))
+        self.width, self.height = PLAYER_SIZE
+        self.image = get_sprite_cache().player_frame(0)
+        self.rect = self.image.get_rect()
+        self.place(WIDTH // 2, HEIGHT - 80)
         self.speed = 7
         self.bank_angle = 0  # For visual rotation
         
     def draw_ship(self, angle):
-        # Clear surface
-        self.image.fill((0, 0, 0, 0))
-        
-        # Create a temporary surface for rotation
-        temp_surf = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        
-        # Draw Neon Ship (Triangle based)
-        points = [(25, 0), (50, 60), (25, 45), (0, 60)]
-        pygame.draw.polygon(temp_surf, C_NEON_CYAN, points, 2)  # Outline
-        pygame.draw.polygon(temp_surf, (0, 100, 100), points)  # Fill
-        
-        # Engine glow
-        pygame.draw.circle(temp_surf, C_NEON_PINK, (25, 50), 5)
-        
-        # Rotate
-        rotated_image = pygame.transform.rotate(temp_surf, -angle * 2)  # Multiply for effect
+        # 取出預先旋轉好的畫格
+        rotated_image = get_sprite_cache().player_frame(angle)
         new_rect = rotated_image.get_rect(center=self.rect.center)
         
         return rotated_image, new_rect
 
-    def update(self):
+    def update(self, steps=1.0):
+        self.begin_step()
         threshold = 0.3
         tilt_magnitude = abs(current_tilt)
         
-        # Movement Logic
+        # Movement Logic（速度以 60 FPS 的每幀位移為單位，乘上 steps）
         if tilt_magnitude > threshold:
             normalized_tilt = min((tilt_magnitude - threshold) / (8 - threshold), 1.0)
-            move_speed = normalized_tilt * self.speed
+            move_speed = normalized_tilt * self.speed * steps
             
             if current_tilt < 0:
-                self.rect.x -= move_speed
-                self.bank_angle = max(self.bank_angle - 2, -25)  # Bank left
+                self.pos.x -= move_speed
+                self.bank_angle = max(self.bank_angle - 2 * steps, -25)  # Bank left
             elif current_tilt > 0:
-                self.rect.x += move_speed
-                self.bank_angle = min(self.bank_angle + 2, 25)  # Bank right
+                self.pos.x += move_speed
+                self.bank_angle = min(self.bank_angle + 2 * steps, 25)  # Bank right
         else:
             # Return to center tilt
             if self.bank_angle > 0:
-                self.bank_angle -= 2
+                self.bank_angle = max(self.bank_angle - 2 * steps, 0)
             elif self.bank_angle < 0:
-                self.bank_angle += 2
+                self.bank_angle = min(self.bank_angle + 2 * steps, 0)
 
-        # Boundaries
-        self.rect.clamp_ip(pygame.Rect(0, 0, WIDTH, HEIGHT))
-        
         # Update visual
-        self.image, rect = self.draw_ship(self.bank_angle)
-        self.rect.size = rect.size  # Update hit box size roughly
+        self.image = get_sprite_cache().player_frame(self.bank_angle)
+        self.rect = self.image.get_rect()  # Update hit box size roughly
+
+        # Boundaries
+        half_w = self.rect.width / 2
+        self.pos.x = max(half_w, min(WIDTH - half_w, self.pos.x))
+        self.sync_rect()
 
-class Enemy(pygame.sprite.Sprite):
+class Enemy(Body):
     def __init__(self):
         super().__init__()
-        self.size = random.randint(30, 45)
-        self.image = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        self.reset()
+
+    def reset(self):
+        self.size = random.choice(ENEMY_SIZES)
+        self.rotation = 0
+        self.rot_speed = random.choice([-ENEMY_ROT_STEP, ENEMY_ROT_STEP])
+        self.color = random.choice(ENEMY_COLORS)
+        self.image = get_sprite_cache().enemy_frame(self.size, self.color, self.rotation)
         self.rect = self.image.get_rect()
         self.reset_pos()
-        self.rotation = 0
-        self.rot_speed = random.choice([-3, 3])
-        self.color = random.choice([C_NEON_PINK, C_NEON_YELLOW])
 
     def reset_pos(self):
-        self.rect.x = random.randrange(WIDTH - self.rect.width)
-        self.rect.y = random.randrange(-150, -50)
+        x = random.randrange(WIDTH - self.rect.width)
+        y = random.randrange(-150, -50)
+        self.place(x + self.rect.width / 2, y + self.rect.height / 2)
         self.speedy = random.randrange(3, 7)
 
-    def update(self):
-        self.rect.y += self.speedy
-        self.rotation = (self.rotation + self.rot_speed) % 360
-        
-        # Draw rotating enemy
-        self.image.fill((0, 0, 0, 0))
-        center = self.size // 2
+    def update(self, steps=1.0):
+        self.begin_step()
+        self.pos.y += self.speedy * steps
+        self.rotation = (self.rotation + self.rot_speed * steps) % 360
         
-        # Abstract Hexagon/Shape
-        radius = self.size // 2 - 2
-        points = []
-        for i in range(6):
-            ang_rad = math.radians(self.rotation + i * 60)
-            px = center + radius * math.cos(ang_rad)
-            py = center + radius * math.sin(ang_rad)
-            points.append((px, py))
-            
-        pygame.draw.polygon(self.image, self.color, points, 2)
-        pygame.draw.circle(self.image, C_WHITE, (center, center), 4)
+        # Rotating enemy from the cache
+        self.image = get_sprite_cache().enemy_frame(self.size, self.color, self.rotation)
+        self.sync_rect()
 
         if self.rect.top > HEIGHT + 10:
             self.reset_pos()
 
-class Bullet(pygame.sprite.Sprite):
+class Bullet(Body):
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((6, 20), pygame.SRCALPHA)
-        pygame.draw.rect(self.image, C_NEON_GREEN, (0, 0, 6, 20), border_radius=3)
-        pygame.draw.rect(self.image, C_WHITE, (2, 2, 2, 16), border_radius=1)  # Core
+        self.reset(x, y)
+
+    def reset(self, x, y):
+        self.image = get_sprite_cache().bullet  # 所有子彈共用同一張圖
         self.rect = self.image.get_rect()
-        self.rect.bottom = y
-        self.rect.centerx = x
+        self.place(x, y - self.rect.height / 2)
         self.speedy = -12
 
-    def update(self):
-        self.rect.y += self.speedy
+    def update(self, steps=1.0):
+        self.begin_step()
+        self.pos.y += self.speedy * steps
+        self.sync_rect()
         if self.rect.bottom < 0:
             self.kill()
 
+# --- Game World ---
+
+class World:
+    # 固定步長的遊戲狀態；只負責模擬與繪製，不處理視窗和事件
+    def __init__(self, enemies=6, stars=STAR_COUNT):
+        self.all_sprites = pygame.sprite.Group()
+        self.mobs = pygame.sprite.Group()
+        self.bullets = pygame.sprite.Group()
+        self.particles = ParticleSystem(MAX_PARTICLES, seed=random.getrandbits(32))
+        self.bullet_pool = ObjectPool(Bullet)
+        self.enemy_pool = ObjectPool(Enemy)
+        self.bullet_index = spatial.SpatialHash()  # broadphase for bullets vs mobs
+        self.mob_index = spatial.SpatialHash()  # broadphase for mobs vs player
+
+        self.player = Player()
+        self.all_sprites.add(self.player)
+
+        # Create Stars
+        self.star_bg = Starfield(stars, WIDTH, HEIGHT)
+
+        for i in range(enemies):
+            self.spawn_enemy()
+
+        self.score = 0
+        self.time = 0.0  # 模擬時間（秒）
+        self.last_shot = -SHOT_INTERVAL
+        self.running = True
+        self.profiler = NULL_PROFILER
+
+    def spawn_enemy(self):
+        m = self.enemy_pool.acquire()
+        self.all_sprites.add(m)
+        self.mobs.add(m)
+
+    def step(self, dt=STEP):
+        steps = dt * 60  # 實體速度以 60 FPS 的每幀位移調校
+        self.time += dt
+        player = self.player
+        particles = self.particles
+
+        # Auto Shoot
+        if self.time - self.last_shot > SHOT_INTERVAL:
+            b = self.bullet_pool.acquire(player.rect.centerx, player.rect.top)
+            self.all_sprites.add(b)
+            self.bullets.add(b)
+            self.last_shot = self.time
+
+        # Updates
+        # Player Engine Particles（原本每幀 50% 機率）
+        if random.random() < 0.5 * steps:
+            particles.emit(player.rect.centerx, player.rect.bottom - 5, C_NEON_CYAN,
+                           random.uniform(-1, 1), random.uniform(2, 5), 20)
+
+        self.star_bg.update(steps)
+        self.all_sprites.update(steps)
+        particles.update(steps)
+        self.profiler.lap('update')
+
+        # Collisions: Bullet hits Mob
+        hits = spatial.groupcollide(self.mobs, self.bullets, True, True, self.bullet_index)
+        # 擊中的敵機已回到物件池：先產生全部爆炸再補生，否則補生會重用它們並 reset 位置與顏色
+        for hit in hits:
+            self.score += 100
+            # Explosion Particles
+            particles.burst(hit.rect.centerx, hit.rect.centery, hit.color, 15, 5, 30)
+        for _ in hits:
+            self.spawn_enemy()
+
+        # Collisions: Mob hits Player
+        if spatial.spritecollide(player, self.mobs, False, self.mob_index):
+            self.running = False  # Simple Game Over
+        self.profiler.lap('collision')
+        return self.running
+
+    def pool_stats(self):
+        # 物件池使用量（high_water 可用來決定預先配置的數量）
+        return {
+            'bullet': self.bullet_pool.stats(),
+            'enemy': self.enemy_pool.stats(),
+            'particle': self.particles.stats(),
+        }
+
+    def draw(self, screen, alpha=1.0, dirty=False):
+        # 不清除畫面（由 renderer 負責）；dirty=True 時回傳所有繪製過的區域
+        rects = []
+        
+        # Draw Stars
+        rects += self.star_bg.draw(screen, alpha, dirty) or []
+        self.profiler.lap('stars')
+        
+        # Draw Particles (one batched pass)
+        rects += self.particles.draw(screen, dirty) or []
+        self.profiler.lap('particles')
+
+        # Draw Sprites（在上一步與目前步之間插值）
+        rects += screen.blits([(s.image, s.image.get_rect(center=s.draw_pos(alpha))) for s in self.all_sprites], dirty) or []
+        self.profiler.lap('sprites')
+        return rects
+
+# --- Rendering ---
+
+class FullRenderer:
+    # 每幀清除並 flip 整個視窗
+    dirty = False
+
+    def __init__(self, screen):
+        self.screen = screen
+
+    def clear(self):
+        self.screen.fill(C_BG)
+
+    def present(self, rects):
+        pygame.display.flip()
+
+    def add_overlay(self, rect):
+        pass
+
+class DirtyRenderer:
+    # 只更新有變動的區域：用預先合成的背景蓋掉上一幀畫過的地方，
+    # 再以 display.update(rects) 推送上一幀與這一幀的區域
+    dirty = True
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = pygame.Surface(screen.get_size()).convert()
+        self.background.fill(C_BG)
+        self.prev_rects = []
+        self.overlays = []  # 每幀在畫面記憶體裡重畫、只在有變化時才推送的區域（HUD）
+        screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def add_overlay(self, rect):
+        self.overlays.append(pygame.Rect(rect))
+
+    def clear(self):
+        screen, background = self.screen, self.background
+        screen.blits([(background, r, r) for r in self.prev_rects + self.overlays], False)
+
+    def present(self, rects):
+        rects = [r for r in rects if r.width and r.height]
+        pygame.display.update(self.prev_rects + rects)
+        self.prev_rects = rects
+
+def make_renderer(screen):
+    return DirtyRenderer(screen) if DIRTY_RENDERING else FullRenderer(screen)
+
 # --- Helper Functions ---
 
 def draw_neon_text(screen, text, font, color, center_pos, glow=True):
@@ -281,71 +647,124 @@ def draw_neon_text(screen, text, font, color, center_pos, glow=True):
     screen.blit(text_surf, text_rect)
     return text_rect
 
-def draw_hud(screen, score, elapsed_time, tilt, font):
-    # Bottom Dashboard Background
-    dashboard_h = 80
-    s = pygame.Surface((WIDTH, dashboard_h), pygame.SRCALPHA)
-    s.fill((0, 10, 20, 230))  # Semi-transparent dark blue
-    pygame.draw.line(s, C_NEON_CYAN, (0, 0), (WIDTH, 0), 2)
-    screen.blit(s, (0, HEIGHT - dashboard_h))
-    
-    center_y = HEIGHT - dashboard_h // 2
-    
-    # 1. Score (Left)
-    draw_neon_text(screen, f"SCORE", font, C_NEON_CYAN, (100, center_y - 15), False)
-    draw_neon_text(screen, f"{score:05d}", font, C_WHITE, (100, center_y + 10), True)
-    
-    # 2. Tilt Gauge (Center)
-    gauge_w = 300
-    gauge_h = 10
-    gauge_x = WIDTH // 2 - gauge_w // 2
-    gauge_y = center_y + 15
-    
-    # Gauge Background
-    pygame.draw.rect(screen, (50, 50, 50), (gauge_x, gauge_y, gauge_w, gauge_h), border_radius=5)
-    # Center Marker
-    pygame.draw.line(screen, C_WHITE, (WIDTH//2, gauge_y-5), (WIDTH//2, gauge_y+15), 2)
-    
-    # Active Bar
-    tilt_clamped = max(-10, min(10, tilt))
-    fill_pct = tilt_clamped / 10  # -1 to 1
-    bar_len = (abs(fill_pct) * (gauge_w // 2))
-    
-    color = C_NEON_GREEN if abs(tilt) < 3 else C_NEON_PINK
-    
-    if fill_pct > 0:  # Right
-        pygame.draw.rect(screen, color, (WIDTH//2, gauge_y, bar_len, gauge_h), border_radius=2)
-    else:  # Left
-        pygame.draw.rect(screen, color, (WIDTH//2 - bar_len, gauge_y, bar_len, gauge_h), border_radius=2)
-        
-    # Tilt Label
-    draw_neon_text(screen, "GYRO STABILIZER", pygame.font.Font(None, 20), C_NEON_CYAN, (WIDTH//2, center_y - 10), False)
-    
-    # 3. Time (Right)
-    minutes = elapsed_time // 60
-    seconds = elapsed_time % 60
-    draw_neon_text(screen, f"TIME", font, C_NEON_CYAN, (WIDTH - 100, center_y - 15), False)
-    draw_neon_text(screen, f"{minutes:02d}:{seconds:02d}", font, C_WHITE, (WIDTH - 100, center_y + 10), True)
+class HUD:
+    # 底部儀表板：字型、背景和靜態標籤只建立一次，
+    # 分數、時間或傾斜條有變化時才重新繪製
+    DASHBOARD_H = 80
+    GAUGE_W = 300
+    GAUGE_H = 10
+
+    def __init__(self, font):
+        self.font = font
+        self.label_font = pygame.font.Font(None, 20)
+        self.rect = pygame.Rect(0, HEIGHT - self.DASHBOARD_H, WIDTH, self.DASHBOARD_H)
+        self.center_y = self.DASHBOARD_H // 2
+        self.gauge_x = WIDTH // 2 - self.GAUGE_W // 2
+        self.gauge_y = self.center_y + 15
+        self.text_cache = {}
+        self.state = None
+        self.base = self._build_base()
+        self.surface = self.base.copy()
+
+    def _build_base(self):
+        # Bottom Dashboard Background
+        s = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        s.fill((0, 10, 20, 230))  # Semi-transparent dark blue
+        pygame.draw.line(s, C_NEON_CYAN, (0, 0), (WIDTH, 0), 2)
+        center_y = self.center_y
+
+        self._blit_text(s, "SCORE", self.font, C_NEON_CYAN, (100, center_y - 15), False)
+        self._blit_text(s, "TIME", self.font, C_NEON_CYAN, (WIDTH - 100, center_y - 15), False)
+
+        # Gauge Background
+        pygame.draw.rect(s, (50, 50, 50), (self.gauge_x, self.gauge_y, self.GAUGE_W, self.GAUGE_H), border_radius=5)
+        # Center Marker
+        pygame.draw.line(s, C_WHITE, (WIDTH//2, self.gauge_y-5), (WIDTH//2, self.gauge_y+15), 2)
+        # Tilt Label
+        self._blit_text(s, "GYRO STABILIZER", self.label_font, C_NEON_CYAN, (WIDTH//2, center_y - 10), False)
+        return s
+
+    def text(self, text, font, color, glow):
+        key = (text, font, color, glow)
+        cached = self.text_cache.get(key)
+        if cached is None:
+            if len(self.text_cache) > 64:
+                self.text_cache.clear()
+            glow_surf = font.render(text, True, (color[0]//2, color[1]//2, color[2]//2)) if glow else None
+            cached = (font.render(text, True, color), glow_surf)
+            self.text_cache[key] = cached
+        return cached
+
+    def _blit_text(self, surf, text, font, color, center_pos, glow=True):
+        text_surf, glow_surf = self.text(text, font, color, glow)
+        text_rect = text_surf.get_rect(center=center_pos)
+        if glow_surf is not None:
+            surf.blit(glow_surf, (text_rect.x + 2, text_rect.y + 2))
+        surf.blit(text_surf, text_rect)
+
+    def update(self, score, elapsed_time, tilt):
+        # Active Bar
+        half_w = self.GAUGE_W // 2
+        tilt_clamped = max(-10, min(10, tilt))
+        fill_pct = tilt_clamped / 10  # -1 to 1
+        bar_len = int(abs(fill_pct) * half_w)
+        color = C_NEON_GREEN if abs(tilt) < 3 else C_NEON_PINK
+
+        state = (score, elapsed_time, bar_len, fill_pct > 0, color)
+        if state == self.state:
+            return False
+        self.state = state
+
+        s = self.surface
+        s.fill((0, 0, 0, 0))
+        s.blit(self.base, (0, 0))
+        center_y = self.center_y
+
+        # 1. Score (Left)
+        self._blit_text(s, f"{score:05d}", self.font, C_WHITE, (100, center_y + 10), True)
+
+        # 2. Tilt Gauge (Center)
+        if fill_pct > 0:  # Right
+            pygame.draw.rect(s, color, (WIDTH//2, self.gauge_y, bar_len, self.GAUGE_H), border_radius=2)
+        else:  # Left
+            pygame.draw.rect(s, color, (WIDTH//2 - bar_len, self.gauge_y, bar_len, self.GAUGE_H), border_radius=2)
+
+        # 3. Time (Right)
+        minutes = elapsed_time // 60
+        seconds = elapsed_time % 60
+        self._blit_text(s, f"{minutes:02d}:{seconds:02d}", self.font, C_WHITE, (WIDTH - 100, center_y + 10), True)
+        return True
+
+    def draw(self, screen, score, elapsed_time, tilt):
+        # 每幀都疊到畫面上（dirty 模式下 renderer 已把這塊蓋回背景），
+        # 但只有內容變了才回傳區域；沒變時畫面上這塊與已推送的一樣，
+        # 被精靈蓋到的部分本來就在更新清單裡
+        changed = self.update(score, elapsed_time, tilt)
+        rect = screen.blit(self.surface, self.rect)
+        return rect if changed else None
 
 # --- Main Menu ---
-def main_menu(screen, clock, iottalk_connected):
+def main_menu(screen, clock, iottalk_connected, profiler=NULL_PROFILER, debug_font=None):
     font_title = pygame.font.Font(None, 100)
     font_sub = pygame.font.Font(None, 40)
-    stars = [Star() for _ in range(40)]
+    stars = Starfield(40, WIDTH, HEIGHT)
     
     # 預覽飛機位置
     preview_x = WIDTH // 2
     preview_y = HEIGHT - 100
     
     while True:
+        profiler.begin_frame()
         screen.fill(C_BG)
         
         # Update Background
-        for star in stars:
-            star.update()
-            star.draw(screen)
+        stars.update()
+        profiler.lap('update')
+        stars.draw(screen)
         
         # 更新預覽飛機位置（響應傾斜控制）
+        update_calibration()
+        read_tilt()
         threshold = 0.3
         tilt_magnitude = abs(current_tilt)
         if tilt_magnitude > threshold:
@@ -358,6 +777,7 @@ def main_menu(screen, clock, iottalk_connected):
                 preview_x += move_speed
         
         preview_x = max(30, min(WIDTH - 30, preview_x))
+        profiler.lap('input')
         
         # Title Animation
         scale = 1.0 + 0.05 * math.sin(time.time() * 3)
@@ -371,6 +791,20 @@ def main_menu(screen, clock, iottalk_connected):
         status_col = C_NEON_GREEN if iottalk_connected else C_NEON_PINK
         status_txt = "SYSTEM ONLINE" if iottalk_connected else "WAITING FOR LINK..."
         draw_neon_text(screen, status_txt, font_sub, status_col, (WIDTH//2, HEIGHT//2))
+
+        # Calibration Status
+        if calibrator.active:
+            if calibrator.ready():
+                calib_txt = "CALIBRATED - PRESS SPACE TO SAVE"
+            elif calibrator.samples < calibrator.min_samples:
+                calib_txt = f"CALIBRATING... HOLD LEVEL ({calibrator.samples}/{calibrator.min_samples})"
+            else:
+                calib_txt = "CALIBRATING... TILT FULLY LEFT AND RIGHT"
+            calib_col = C_NEON_GREEN if calibrator.ready() else C_NEON_YELLOW
+        else:
+            calib_txt, calib_col = "PRESS C TO RECALIBRATE", (120, 120, 160)
+        calib_surf = pygame.font.Font(None, 24).render(calib_txt, True, calib_col)
+        screen.blit(calib_surf, calib_surf.get_rect(center=(WIDTH//2, HEIGHT//2 + 40)))
         
         # Instruction
         if int(time.time() * 2) % 2 == 0:  # Blink
@@ -392,15 +826,27 @@ def main_menu(screen, clock, iottalk_connected):
         preview_hint = pygame.font.Font(None, 22).render("Try tilting your phone to control the plane!", True, C_NEON_CYAN)
         preview_hint_rect = preview_hint.get_rect(center=(WIDTH // 2, preview_y + 40))
         screen.blit(preview_hint, preview_hint_rect)
+        profiler.lap('draw')
             
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
             if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                finish_calibration()
                 return True
-            
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+                start_calibration()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+        profiler.lap('events')
+
+        if profiler.overlay:
+            profiler.draw_overlay(screen, debug_font)
         pygame.display.flip()
+        profiler.lap('flip')
         clock.tick(FPS)
+        profiler.lap('wait')
+        profiler.end_frame()
 
 # --- Main Loop ---
 def main():
@@ -409,110 +855,96 @@ def main():
     pygame.display.set_caption("🎮 Sky Fighter: IoT Edition")
     clock = pygame.time.Clock()
     font = pygame.font.Font(None, 36)
+    debug_font = pygame.font.Font(None, 20)
+    profiler = FrameProfiler()
+    profiler.overlay = PROFILE_OVERLAY
+    get_sprite_cache()  # 啟動時預先繪製所有造型
 
     # Start IoT Thread
-    t = threading.Thread(target=iottalk_listener)
+    t = threading.Thread(target=replay_listener if TILT_REPLAY else iottalk_listener)
     t.daemon = True
     t.start()
     
     # Wait briefly for connection
     time.sleep(1)
+    load_calibration()
     
-    if not main_menu(screen, clock, True):
+    if not main_menu(screen, clock, True, profiler, debug_font):
+        close_recorder()
         pygame.quit()
         return
 
     # Game Setup
-    all_sprites = pygame.sprite.Group()
-    mobs = pygame.sprite.Group()
-    bullets = pygame.sprite.Group()
-    particles = pygame.sprite.Group()
-    
-    player = Player()
-    all_sprites.add(player)
-    
-    # Create Stars
-    star_bg = [Star() for _ in range(50)]
-
-    for i in range(6):
-        m = Enemy()
-        all_sprites.add(m)
-        mobs.add(m)
-
-    score = 0
-    start_time = time.time()
-    last_shot = 0
+    world = World()
+    world.profiler = profiler
+    renderer = make_renderer(screen)
+    hud = HUD(font)
+    renderer.add_overlay(hud.rect)
+    accumulator = 0.0
     running = True
+    clock.tick(FPS)  # 重設計時，不把主選單的時間算進第一幀
 
     while running:
-        dt = clock.tick(FPS)
-        now = time.time()
+        profiler.begin_frame()
+        # 渲染幀率（FPS）與模擬頻率（PHYSICS_HZ）分開
+        accumulator += clock.tick(FPS) / 1000.0
+        profiler.lap('wait')
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-        # Auto Shoot
-        if now - last_shot > 0.2:
-            b = Bullet(player.rect.centerx, player.rect.top)
-            all_sprites.add(b)
-            bullets.add(b)
-            last_shot = now
-
-        # Updates
-        # Player Engine Particles
-        if random.random() < 0.5:
-            p = Particle(player.rect.centerx, player.rect.bottom - 5, C_NEON_CYAN, 
-                        random.uniform(-1, 1), random.uniform(2, 5), 20)
-            all_sprites.add(p)
-            particles.add(p)
-
-        for star in star_bg:
-            star.update()
-        all_sprites.update()
-
-        # Collisions: Bullet hits Mob
-        hits = pygame.sprite.groupcollide(mobs, bullets, True, True)
-        for hit in hits:
-            score += 100
-            # Explosion Particles
-            for _ in range(15):
-                p = Particle(hit.rect.centerx, hit.rect.centery, hit.color, 
-                            random.uniform(-5, 5), random.uniform(-5, 5), 30)
-                all_sprites.add(p)
-                particles.add(p)
-                
-            m = Enemy()
-            all_sprites.add(m)
-            mobs.add(m)
-
-        # Collisions: Mob hits Player
-        if pygame.sprite.spritecollide(player, mobs, False):
-            running = False  # Simple Game Over
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle_overlay()
+        profiler.lap('events')
+
+        read_tilt()
+        tilt = current_tilt
+        profiler.lap('input')
+
+        # Fixed-step updates，落後太多時最多追 MAX_CATCHUP_STEPS 步
+        steps = 0
+        while accumulator >= STEP and steps < MAX_CATCHUP_STEPS:
+            if not world.step():
+                running = False
+                break
+            accumulator -= STEP
+            steps += 1
+        if steps == MAX_CATCHUP_STEPS:
+            accumulator = min(accumulator, STEP)  # 放棄剩下的落後時間，避免越追越慢
 
         # --- Draw ---
-        screen.fill(C_BG)
-        
-        # Draw Stars
-        for star in star_bg:
-            star.draw(screen)
-        
-        # Draw Sprites
-        all_sprites.draw(screen)
+        renderer.clear()
+        profiler.lap('clear')
+        rects = world.draw(screen, accumulator / STEP, renderer.dirty)
         
         # Draw HUD
-        elapsed = int(now - start_time)
-        draw_hud(screen, score, elapsed, current_tilt, font)
+        hud_rect = hud.draw(screen, world.score, int(world.time), tilt)
+        if hud_rect: rects.append(hud_rect)
+        profiler.lap('hud')
 
-        pygame.display.flip()
+        if profiler.overlay:
+            rects.append(profiler.draw_overlay(screen, debug_font))
+            profiler.lap('overlay')
+
+        renderer.present(rects)
+        profiler.lap('flip')
+        profiler.end_frame()
+
+    print(f"📊 Pool stats: {world.pool_stats()}")
+    print(f"🎮 Input stats: {tilt_channel.stats()}")
+    summary = profiler.summary()
+    print(f"⏱️ Frame time p50/p95/p99: {summary['p50']:.2f} / {summary['p95']:.2f} / {summary['p99']:.2f} ms")
+    if PROFILE_DUMP:
+        profiler.dump(PROFILE_DUMP)
 
     # Game Over Screen
     time.sleep(0.5)
     screen.fill((0, 0, 0))
     draw_neon_text(screen, "MISSION FAILED", pygame.font.Font(None, 80), C_NEON_PINK, (WIDTH//2, HEIGHT//2 - 50))
-    draw_neon_text(screen, f"FINAL SCORE: {score}", font, C_WHITE, (WIDTH//2, HEIGHT//2 + 20))
+    draw_neon_text(screen, f"FINAL SCORE: {world.score}", font, C_WHITE, (WIDTH//2, HEIGHT//2 + 20))
     pygame.display.flip()
     time.sleep(3)
+    close_recorder()
     pygame.quit()
 
 if __name__ == '__main__':
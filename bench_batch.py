@@ -0,0 +1,74 @@
+"""
+Benchmark: per-feature DAN loop vs DAN.push_many / DAN.pull_many
+
+One DAI cycle pushes every IDF and pulls every ODF on the local mock CSM,
+with a fixed server latency per response. Prints ms per cycle:
+
+  loop      the old DF_function_handler: one request per feature + 1 ms sleep
+  batch     push_many / pull_many on a server with the /batch endpoint
+  parallel  push_many / pull_many when the server has no batch endpoint,
+            so each feature is its own request but all are in flight at once
+
+Usage: python bench_batch.py [--latency 0.01] [--cycles 20]
+"""
+
+import argparse
+import time
+
+import csmapi
+import DAN
+from mock_csm import MockCSM
+
+FEATURE_COUNTS = [1, 2, 4, 8, 16]
+
+
+def loop_cycle(idfs, odfs, value):
+    for idf in idfs:
+        DAN.push(idf, [value])
+        time.sleep(0.001)
+    for odf in odfs:
+        DAN.pull(odf)
+        time.sleep(0.001)
+
+
+def batch_cycle(idfs, odfs, value):
+    DAN.push_many({idf: [value] for idf in idfs})
+    DAN.pull_many(odfs)
+
+
+def run(cycle, features, latency, cycles, batch):
+    idfs = ['IDF{}'.format(i) for i in range(features)]
+    odfs = ['ODF{}'.format(i) for i in range(features)]
+    with MockCSM(latency=latency, batch=batch) as csm:
+        csmapi.ENDPOINT = csm.url
+        csmapi.BATCH = None
+        csmapi.register(DAN.MAC, {'d_name': 'Bench', 'df_list': idfs + odfs})
+        DAN.timestamp = {df: '' for df in idfs + odfs}
+        for odf in odfs:
+            csm.feed(DAN.MAC, odf, [0])
+        cycle(idfs, odfs, 0)  # warm up connections (and the batch probe)
+        start = time.perf_counter()
+        for i in range(cycles):
+            cycle(idfs, odfs, i)
+        elapsed = time.perf_counter() - start
+        requests = csm.stats['requests']
+    return elapsed / cycles * 1000, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched vs per-feature DAN benchmark against mock_csm')
+    parser.add_argument('--latency', type=float, default=0.01, help='server latency per response (s)')
+    parser.add_argument('--cycles', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"server latency {args.latency * 1000:.0f} ms, {args.cycles} cycles, ms per cycle (IDFs = ODFs = features)")
+    print(f"{'features':>8} {'loop':>9} {'batch':>9} {'parallel':>9}")
+    for n in FEATURE_COUNTS:
+        loop_ms, _ = run(loop_cycle, n, args.latency, args.cycles, True)
+        batch_ms, _ = run(batch_cycle, n, args.latency, args.cycles, True)
+        parallel_ms, _ = run(batch_cycle, n, args.latency, args.cycles, False)
+        print(f"{n:>8} {loop_ms:>9.1f} {batch_ms:>9.1f} {parallel_ms:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
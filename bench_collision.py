@@ -0,0 +1,67 @@
+"""
+Benchmark: spatial-hash broadphase vs pygame pairwise collision
+
+Runs the same moving mobs/bullets scene through pygame.sprite.groupcollide
+and spatial.groupcollide at growing entity counts and prints ms per frame.
+
+Usage: python bench_collision.py [frames]
+"""
+
+import random
+import sys
+import time
+
+import pygame
+
+import spatial
+
+WIDTH, HEIGHT = 800, 600
+COUNTS = [6, 50, 100, 250, 500, 1000, 2000]
+
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, rng, w, h, speedy):
+        super().__init__()
+        self.rect = pygame.Rect(rng.randrange(WIDTH - w), rng.randrange(HEIGHT), w, h)
+        self.speedy = speedy
+
+    def update(self):
+        self.rect.y = (self.rect.y + self.speedy) % HEIGHT
+
+
+def make_scene(n, seed):
+    rng = random.Random(seed)
+    mobs = pygame.sprite.Group(Box(rng, 36, 36, rng.randrange(3, 7)) for _ in range(n))
+    bullets = pygame.sprite.Group(Box(rng, 6, 20, -12) for _ in range(n))
+    return mobs, bullets
+
+
+def run(n, frames, use_hash):
+    mobs, bullets = make_scene(n, seed=n)
+    index = spatial.SpatialHash()
+    hits_total = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        mobs.update()
+        bullets.update()
+        if use_hash:
+            hits = spatial.groupcollide(mobs, bullets, False, False, index)
+        else:
+            hits = pygame.sprite.groupcollide(mobs, bullets, False, False)
+        hits_total += sum(len(v) for v in hits.values())
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / frames, hits_total
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    print(f"{'entities':>10} {'pairwise ms':>12} {'hash ms':>10} {'speedup':>8}  hits")
+    for n in COUNTS:
+        pair_ms, pair_hits = run(n, frames, False)
+        hash_ms, hash_hits = run(n, frames, True)
+        status = 'ok' if pair_hits == hash_hits else f'MISMATCH {pair_hits} != {hash_hits}'
+        print(f"{n:>10} {pair_ms:>12.3f} {hash_ms:>10.3f} {pair_ms / hash_ms:>7.1f}x  {status}")
+
+
+if __name__ == '__main__':
+    main()
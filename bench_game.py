@@ -0,0 +1,54 @@
+"""
+Gameplay benchmark suite built on headless.py
+
+Runs a fixed set of seeded scenarios and prints steps/sec and p95 step time
+for each, so throughput can be compared from commit to commit. With --json
+the full results are written out as well.
+
+Usage: python bench_game.py [--quick] [--json results.json] [scenario ...]
+"""
+
+import argparse
+import json
+
+import headless
+
+SCENARIOS = {
+    'baseline': dict(steps=6000, enemies=6),
+    'many_enemies': dict(steps=3000, enemies=300),
+    'particle_storm': dict(steps=3000, enemies=6, bursts_per_step=4),
+    'dense_stars': dict(steps=3000, enemies=6, stars=5000),
+    'dirty_render': dict(steps=6000, enemies=6, dirty=True),
+    'logic_only': dict(steps=20000, enemies=50, render=False),
+    'long_session': dict(steps=120000, enemies=6, tilt='random'),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sky Fighter gameplay benchmarks')
+    parser.add_argument('scenarios', nargs='*', help='subset of: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--quick', action='store_true', help='run each scenario for 1/10 of its steps')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write full results to this file')
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    results = {}
+    print(f"{'scenario':<16} {'steps':>7} {'steps/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak particles':>15}")
+    for name in names:
+        params = dict(SCENARIOS[name])
+        if args.quick:
+            params['steps'] = max(1, params['steps'] // 10)
+        result = headless.run(seed=args.seed, **params)
+        results[name] = result
+        peak = result['pools']['particle']['high_water']
+        print(f"{name:<16} {result['steps']:>7} {result['steps_per_sec']:>9.0f} "
+              f"{result['step_p50_ms']:>8.3f} {result['step_p95_ms']:>8.3f} {result['step_p99_ms']:>8.3f} {peak:>15}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Load test: how many devices one DeviceHub can serve on one CPU core
+
+The mock CSM runs in a separate process (on the other cores) and plays one
+phone per device: every registered device gets a Dummy_Control sample --rate
+times a second. This process is pinned to one core and serves N devices
+through a DeviceHub, over HTTP polling or one shared MQTT connection.
+Reported per N:
+
+  expected/s  samples the phones sent per second (N x rate)
+  got/s       samples the hub delivered per second
+  %           got / expected (HTTP polling keeps only the newest sample per poll)
+  mean/p95 ms phone-to-hub delivery latency
+  cpu %       hub process CPU time / wall time (100 = the core is saturated)
+
+A device count is sustained while % stays >= 95 and cpu % < 90.
+
+Usage: python bench_hub.py [--mode http|mqtt|both] [--rate 10] [--seconds 5] [--sessions 10,50,100,200]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import csmapi
+from hub import DeviceHub
+from streaming_stats import P2Quantile, RunningStats
+
+PROFILE = {'dm_name': 'Dummy_Device', 'df_list': ['Dummy_Sensor', 'Dummy_Control']}
+ODF = 'Dummy_Control'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_mock(*args):
+    # mock_csm.py (CSM + MQTT broker) in its own process; returns (process, url, mqtt_port)
+    http_port, mqtt_port = free_port(), free_port()
+    proc = subprocess.Popen([sys.executable, 'mock_csm.py', '--port', str(http_port), '--mqtt-port', str(mqtt_port),
+                             *args], stdout=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+    url = 'http://127.0.0.1:{}'.format(http_port)
+    for _ in range(100):
+        try:
+            csmapi.alive(url, 0.2)
+            return proc, url, mqtt_port
+        except Exception:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('mock CSM did not start')
+
+
+def pin_to_one_core(mock_pid):
+    # hub on the first allowed core, the mock on the rest (Linux only); with a
+    # single core the mock shares it and the numbers are a lower bound
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    cores = sorted(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, {cores[0]})
+    if len(cores) > 1:
+        os.sched_setaffinity(mock_pid, set(cores[1:]))
+    return cores[0]
+
+
+def run(n, mode, url, mqtt_port, rate, seconds):
+    lock = threading.Lock()
+    latency = RunningStats()
+    p95 = P2Quantile(0.95)
+    counting = threading.Event()
+
+    def on_data(session, feature, data):
+        if not counting.is_set():
+            return
+        delay = (time.time() - data[3]) * 1000
+        with lock:
+            latency.add(delay)
+            p95.add(delay)
+
+    csmapi.ENDPOINT = url
+    hub = DeviceHub(on_data=on_data)
+    hub.open_many([(PROFILE, 'HUB{:05d}'.format(i), [ODF]) for i in range(n)])
+    if mode == 'mqtt':
+        hub.connect_mqtt('127.0.0.1', mqtt_port)
+        hub.mqtt_link.wait(5)
+    hub.start()
+    time.sleep(1.0)  # warm up: connections, subscriptions, first samples
+
+    counting.set()
+    wall, cpu = time.monotonic(), time.process_time()
+    time.sleep(seconds)
+    wall, cpu = time.monotonic() - wall, time.process_time() - cpu
+    counting.clear()
+
+    hub.stop()
+    with lock:
+        return latency.n / wall, latency.mean, p95.value, cpu / wall * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DeviceHub load test against mock_csm')
+    parser.add_argument('--mode', choices=['http', 'mqtt', 'both'], default='both')
+    parser.add_argument('--rate', type=float, default=10.0, help='samples per second per phone')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--sessions', default='10,50,100,200', help='comma separated device counts')
+    args = parser.parse_args()
+
+    proc, url, mqtt_port = start_mock('--feed', '{}={}'.format(ODF, args.rate))
+    try:
+        core = pin_to_one_core(proc.pid)
+        print(f"hub pinned to core {core}, {args.rate:.0f} samples/s per phone, {args.seconds:.0f} s per run")
+        print(f"{'mode':<5} {'devices':>7} {'expected/s':>10} {'got/s':>8} {'%':>5} {'mean ms':>8} {'p95 ms':>7} {'cpu %':>6}")
+        modes = ['http', 'mqtt'] if args.mode == 'both' else [args.mode]
+        for mode in modes:
+            for n in [int(x) for x in args.sessions.split(',')]:
+                got, mean, p95, cpu = run(n, mode, url, mqtt_port, args.rate, args.seconds)
+                expected = n * args.rate
+                print(f"{mode:<5} {n:>7} {expected:>10.0f} {got:>8.0f} {got / expected * 100:>5.0f} "
+                      f"{mean:>8.1f} {p95:>7.1f} {cpu:>6.0f}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: DAI's former per-sample mqtt_pub vs MQTTPublisher
+
+K IDF streams publish at --rate Hz each (e.g. 50 Hz gyroscope rebroadcast)
+to the mock broker running in its own process; a subscriber in this process
+counts what arrives. Reported per mode:
+
+  us/push   time the caller (the IDF loop) spends per sample
+  messages  MQTT messages on the wire
+  got %     samples that reached the subscriber
+  dropped   samples the publisher's bounded queue had to drop
+  cpu %     this process's CPU time / wall time
+
+  old         DAI's former mqtt_pub (copied below) on a connected client without a network loop
+  queue       MQTTPublisher, one message per sample
+  coalesce    MQTTPublisher, up to --coalesce samples of an IDF per message,
+              gathered for --linger seconds
+
+Usage: python bench_publish.py [--idfs 20] [--rate 50] [--seconds 5] [--coalesce 10] [--linger 0.1]
+"""
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime as dt
+
+import paho.mqtt.client as mqtt
+
+from bench_hub import start_mock
+from mqtt_publisher import MQTTPublisher
+
+DEVICE = 'BENCHPUB'
+
+
+def mqtt_pub(client, deviceId, IDF, data):
+    # DAI's previous publish path, kept here as the baseline
+    topic = '{}//{}'.format(deviceId, IDF)
+    sample = [str(dt.today()), data]
+    payload = json.dumps({'samples': [sample]})
+    client.publish(topic, payload)
+
+
+class Counter:
+    def __init__(self, port):
+        self.messages = 0
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.client.on_message = self.on_message
+        self.client.connect('127.0.0.1', port)
+        self.client.subscribe(DEVICE + '//#')
+        self.client.loop_start()
+
+    def on_message(self, client, userdata, msg):
+        n = len(json.loads(msg.payload)['samples'])
+        with self.lock:
+            self.messages += 1
+            self.samples += n
+
+    def reset(self):
+        with self.lock:
+            self.messages = self.samples = 0
+
+
+def connect(port):
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.connect('127.0.0.1', port)
+    return client
+
+
+def run(mode, port, counter, idfs, rate, seconds, coalesce, linger):
+    client = connect(port)
+    publisher = None
+    if mode == 'old':
+        push = lambda idf, data: mqtt_pub(client, DEVICE, idf, data)
+    else:
+        publisher = MQTTPublisher(client, DEVICE, coalesce=coalesce if mode == 'coalesce' else 1,
+                                  linger=linger if mode == 'coalesce' else 0.0).start()
+        push = publisher.push
+    names = ['IDF{}'.format(i) for i in range(idfs)]
+    time.sleep(0.2)
+    counter.reset()
+
+    ticks = int(seconds * rate)
+    in_push = 0.0
+    wall, cpu = time.monotonic(), time.process_time()
+    for tick in range(ticks):
+        t = time.perf_counter()
+        for name in names:
+            push(name, [0.0, 0.0, float(tick)])
+        in_push += time.perf_counter() - t
+        time.sleep(max(0.0, wall + (tick + 1) / rate - time.monotonic()))
+    if publisher:
+        publisher.flush(5)
+    wall, cpu = time.monotonic() - wall, time.process_time() - cpu
+    time.sleep(0.5)  # let the last messages arrive
+
+    sent = ticks * idfs
+    dropped = publisher.stats['dropped'] if publisher else 0
+    if publisher:
+        publisher.stop()
+    else:
+        client.disconnect()
+    return in_push / sent * 1e6, counter.messages, counter.samples / sent * 100, dropped, cpu / wall * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MQTT publish path benchmark against the mock broker')
+    parser.add_argument('--idfs', type=int, default=20, help='IDF streams')
+    parser.add_argument('--rate', type=float, default=50.0, help='samples per second per IDF')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--coalesce', type=int, default=10)
+    parser.add_argument('--linger', type=float, default=0.1, help='coalesce mode: seconds to gather a burst')
+    args = parser.parse_args()
+
+    proc, url, port = start_mock()
+    try:
+        counter = Counter(port)
+        print(f"{args.idfs} IDFs x {args.rate:.0f} Hz = {args.idfs * args.rate:.0f} samples/s for {args.seconds:.0f} s")
+        print(f"{'mode':<9} {'us/push':>8} {'messages':>9} {'got %':>6} {'dropped':>8} {'cpu %':>6}")
+        for mode in ('old', 'queue', 'coalesce'):
+            us, messages, got, dropped, cpu = run(mode, port, counter, args.idfs, args.rate, args.seconds, args.coalesce, args.linger)
+            print(f"{mode:<9} {us:>8.1f} {messages:>9} {got:>6.1f} {dropped:>8} {cpu:>6.0f}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: DAN.pull modes against the local mock CSM
+
+A feeder thread pushes a sample at --rate Hz (like the phone) while the
+reader polls DAN.pull at --poll Hz (like Game's HTTP fallback) for each
+pull mode. Reported per mode:
+
+  requests   HTTP requests the reader made
+  kB         response bytes sent by the server
+  parsed     responses with a body (JSON the client had to decode)
+  new        new samples returned by DAN.pull
+  delay ms   mean time from push to DAN.pull returning the sample
+
+Usage: python bench_pull.py [--seconds 5] [--rate 10] [--poll 50]
+"""
+
+import argparse
+import threading
+import time
+
+import csmapi
+import DAN
+from mock_csm import MockCSM
+
+FEATURE = 'Dummy_Control'
+MODES = ['full', 'conditional', 'long_poll']
+
+
+def feeder(csm, rate, stop):
+    while not stop.is_set():
+        csm.feed(DAN.MAC, FEATURE, [[0.0, 0.0, 1.0, time.monotonic()]])
+        stop.wait(1 / rate)
+
+
+def run_mode(mode, seconds, rate, poll):
+    with MockCSM() as csm:
+        csmapi.ENDPOINT = csm.url
+        csmapi.register(DAN.MAC, {'d_name': 'Bench', 'df_list': [FEATURE]})
+        DAN.timestamp = {FEATURE: ''}
+        DAN.etag.clear()
+        DAN.pull_mode = mode
+
+        stop = threading.Event()
+        t = threading.Thread(target=feeder, args=(csm, rate, stop), daemon=True)
+        t.start()
+        new, delay = 0, 0.0
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            data = DAN.pull(FEATURE)
+            if data is not None:
+                new += 1
+                delay += time.monotonic() - data[0][3]
+            if mode != 'long_poll':
+                time.sleep(1 / poll)
+        stop.set()
+        t.join()
+        stats = dict(csm.stats)
+    requests = stats['requests']
+    return requests, stats['bytes_sent'] / 1024, requests - stats['not_modified'], new, delay / new * 1000 if new else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DAN.pull mode benchmark against mock_csm')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=10.0, help='samples pushed per second')
+    parser.add_argument('--poll', type=float, default=50.0, help='polls per second (full / conditional)')
+    args = parser.parse_args()
+
+    print(f"{args.seconds:.0f} s, {args.rate:.0f} samples/s pushed, polling at {args.poll:.0f} Hz")
+    print(f"{'mode':<12} {'requests':>9} {'kB':>8} {'parsed':>7} {'new':>5} {'delay ms':>9}")
+    for mode in MODES:
+        requests, kb, parsed, new, delay = run_mode(mode, args.seconds, args.rate, args.poll)
+        print(f"{mode:<12} {requests:>9} {kb:>8.1f} {parsed:>7} {new:>5} {delay:>9.1f}")
+    DAN.pull_mode = 'full'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: tilt filters on a replayed stream with simulated network delay
+
+Each sample is delivered late (base delay + random jitter, in order, like a
+TCP/MQTT link). Every filter sees the samples at their arrival time and is
+read at 60 FPS, with and without a prediction lead. Output is
+compared with the undelayed stream:
+
+  rmse    error against the true signal at render time
+  lag     time shift (ms) that best aligns output with truth
+  jitter  RMS of the frame-to-frame second difference (roughness)
+
+Usage: python bench_tilt_filter.py [--file session.tilt] [--delay 0.08] [--jitter 0.04]
+"""
+
+import argparse
+import math
+import random
+
+from tilt_filter import FILTERS, make_filter
+
+FRAME = 1 / 60
+MAX_LAG = 0.4
+
+
+def synthetic_stream(seconds=60, rate=50, seed=0):
+    # Slow sweeps plus sensor noise, already mapped to -10..10
+    rng = random.Random(seed)
+    out = []
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        clean = 8 * math.sin(t * 1.3) * math.sin(t * 0.21)
+        out.append((t, max(-10.0, min(10.0, clean + rng.gauss(0, 0.4)))))
+    return out
+
+
+def recorded_stream(path):
+    import Game
+    from tilt_record import TiltPlayback, to_payload
+    with TiltPlayback(path) as playback:
+        return [(t, Game.map_tilt(to_payload(a, b, g))) for t, a, b, g in playback]
+
+
+def truth_at(stream, t, i):
+    # Linear interpolation over the true stream; i is a forward-only cursor
+    while i + 1 < len(stream) and stream[i + 1][0] <= t:
+        i += 1
+    t0, x0 = stream[i]
+    if i + 1 < len(stream) and t >= t0:
+        t1, x1 = stream[i + 1]
+        return x0 + (x1 - x0) * (t - t0) / (t1 - t0), i
+    return x0, i
+
+
+def deliver(stream, delay, jitter, seed):
+    rng = random.Random(seed)
+    arrivals, last = [], 0.0
+    for t, x in stream:
+        last = max(last, t + delay + rng.expovariate(1 / jitter) if jitter else t + delay)
+        arrivals.append((last, t, x))
+    return arrivals
+
+
+def evaluate(stream, arrivals, filt, lead):
+    frames = int(stream[-1][0] / FRAME)
+    out, truth = [], []
+    k, cursor = 0, 0
+    for f in range(frames):
+        now = f * FRAME
+        while k < len(arrivals) and arrivals[k][0] <= now:
+            arrival, _, x = arrivals[k]
+            filt.update(arrival, x)  # the game only knows arrival time
+            k += 1
+        out.append(filt.predict(now + lead))
+        value, cursor = truth_at(stream, now, cursor)
+        truth.append(value)
+
+    rmse = math.sqrt(sum((o - t) ** 2 for o, t in zip(out, truth)) / len(out))
+    best_shift, best_err = 0, float('inf')
+    for shift in range(int(MAX_LAG / FRAME)):
+        err = sum((out[i] - truth[i - shift]) ** 2 for i in range(shift, len(out)))
+        err /= len(out) - shift
+        if err < best_err:
+            best_shift, best_err = shift, err
+    second_diff = [out[i] - 2 * out[i - 1] + out[i - 2] for i in range(2, len(out))]
+    jitter = math.sqrt(sum(d * d for d in second_diff) / len(second_diff))
+    return rmse, best_shift * FRAME * 1000, jitter
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tilt filter jitter/lag benchmark')
+    parser.add_argument('--file', help='tilt_record file to replay (default: synthetic stream)')
+    parser.add_argument('--delay', type=float, default=0.08, help='base network delay (s)')
+    parser.add_argument('--jitter', type=float, default=0.04, help='mean extra delay (s)')
+    parser.add_argument('--lead', type=float, default=None, help='prediction lead (s); default = delay')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    stream = recorded_stream(args.file) if args.file else synthetic_stream(seed=args.seed)
+    if len(stream) < 2 or stream[-1][0] < MAX_LAG * 2:
+        parser.error('stream is too short to evaluate')
+    arrivals = deliver(stream, args.delay, args.jitter, args.seed)
+    lead = args.delay if args.lead is None else args.lead
+
+    print(f"{len(stream)} samples, delay {args.delay * 1000:.0f} ms + jitter {args.jitter * 1000:.0f} ms, lead {lead * 1000:.0f} ms")
+    print(f"{'filter':<14} {'rmse':>7} {'lag ms':>8} {'jitter':>8}")
+    for name in FILTERS:
+        for use_lead in (0.0, lead) if name != 'none' else (0.0,):
+            rmse, lag, jitter = evaluate(stream, arrivals, make_filter(name), use_lead)
+            label = name + (' +pred' if use_lead else '')
+            print(f"{label:<14} {rmse:>7.3f} {lag:>8.1f} {jitter:>8.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Online tilt calibration from live gyroscope samples.
+
+OnlineCalibrator watches raw gamma values (e.g. while the player idles in
+the main menu) and keeps only streaming statistics. The first min_samples
+samples are the "hold level" phase; after that the 2nd/98th percentiles of
+everything seen are the left/right extremes:
+
+    baseline     = mean of the hold-level samples
+    dead_zone    = max(min_dead_zone, noise_k * stdev of the hold-level samples)
+    scale_factor = FULL_SCALE / span, span = largest extreme offset from baseline
+
+test_tilt_data.py suggests dead_zone = 10% of the largest offset instead;
+here the dead zone follows the measured sensor noise, so a steady phone gets
+a tight one regardless of how far the player tilts. CalibrationStore keeps
+the result per device ID in a JSON file so later runs can skip calibration.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+from streaming_stats import P2Quantile, RunningStats
+
+TiltParams = namedtuple('TiltParams', 'baseline dead_zone scale_factor')
+
+FULL_SCALE = 10.0  # map the extreme offset to ±10 like Game.map_tilt expects
+
+
+class OnlineCalibrator:
+    def __init__(self, fallback, min_samples=150, min_span=3.0, noise_k=3.0, min_dead_zone=0.3):
+        self.fallback = fallback  # TiltParams used for anything not yet measurable
+        self.min_samples = min_samples
+        self.min_span = min_span  # degrees of tilt needed before the scale is trusted
+        self.noise_k = noise_k  # dead zone = noise_k * noise floor
+        self.min_dead_zone = min_dead_zone
+        self.active = False
+        self.lock = threading.Lock()  # samples arrive on the listener thread
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = 0
+            self.level = RunningStats()  # hold-level phase only
+            self.low = P2Quantile(0.02)
+            self.high = P2Quantile(0.98)
+
+    def add(self, gamma):
+        with self.lock:
+            self.samples += 1
+            if self.level.n < self.min_samples:
+                self.level.add(gamma)
+            self.low.add(gamma)
+            self.high.add(gamma)
+
+    def span(self):
+        with self.lock:
+            if self.level.n < self.min_samples:
+                return 0.0
+            baseline = self.level.mean
+            return max(self.high.value - baseline, baseline - self.low.value)
+
+    def ready(self):
+        return self.samples >= self.min_samples and self.span() >= self.min_span
+
+    def estimate(self):
+        """Current TiltParams, or None before min_samples samples were seen."""
+        if self.samples < self.min_samples:
+            return None
+        span = self.span()
+        with self.lock:
+            baseline = self.level.mean
+            noise = self.level.stdev
+        dead_zone = max(self.min_dead_zone, self.noise_k * noise)
+        if span >= self.min_span:
+            scale_factor = FULL_SCALE / span
+        else:
+            scale_factor = self.fallback.scale_factor  # player has not tilted far enough yet
+        return TiltParams(baseline, dead_zone, scale_factor)
+
+
+class CalibrationStore:
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, device_id):
+        entry = self._read().get(device_id)
+        if not entry:
+            return None
+        try:
+            return TiltParams(entry['baseline'], entry['dead_zone'], entry['scale_factor'])
+        except KeyError:
+            return None
+
+    def save(self, device_id, params, samples=0):
+        data = self._read()
+        data[device_id] = dict(params._asdict(), samples=samples,
+                               updated=time.strftime('%Y-%m-%d %H:%M:%S'))
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)  # never leave a half-written file behind
@@ -1,68 +1,275 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 
 ENDPOINT = None
 TIMEOUT=10
-IoTtalk = requests.Session()
+POOL_SIZE=8         # keep-alive connections per host, also the max in-flight async calls
 passwordKey = None
+BATCH = None        # server batch endpoint: None = not probed yet, then True / False
 
 class CSMError(Exception):
-    pass
+    status_code = None  # HTTP status when the server answered with an error
 
-def register(mac_addr, profile, UsingSession=IoTtalk):
+def make_session(pool_size=POOL_SIZE):
+    # pool_block: wait for a free keep-alive connection instead of opening a throwaway one
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    s.mount('http://', adapter)
+    s.mount('https://', adapter)
+    return s
+
+IoTtalk = make_session()
+
+
+# Each call is described once as (method, path, request kwargs, parse(response)[, statuses]),
+# statuses being the HTTP statuses parse accepts (default 200 only);
+# the sync functions below and AsyncCSM both send these.
+def _send(op, UsingSession, timeout=None, endpoint=None):
+    method, path, kwargs, parse, *statuses = op
+    kwargs = dict(kwargs)
+    if timeout is not None or 'timeout' not in kwargs:
+        kwargs['timeout'] = TIMEOUT if timeout is None else timeout
+    r = UsingSession.request(method, (ENDPOINT if endpoint is None else endpoint) + path, **kwargs)
+    if r.status_code not in (statuses[0] if statuses else (200,)):
+        e = CSMError(r.text)
+        e.status_code = r.status_code
+        raise e
+    return parse(r)
+
+def _auth(password):
+    # Each call uses the module's passwordKey unless the caller manages its own (DAN.DeviceSession)
+    return {'password-key': passwordKey if password is None else password}
+
+def _registered(r):
+    return r.json().get('d_name'), r.json().get('password')
+
+def _alive():
+    return 'GET', '/', {}, lambda r: True
+
+def _register(mac_addr, profile):
+    return 'POST', '/' + mac_addr, {'json': {'profile': profile}}, _registered
+
+def _deregister(mac_addr):
+    return 'DELETE', '/' + mac_addr, {}, lambda r: True
+
+def _push(mac_addr, df_name, data, password=None):
+    return 'PUT', '/' + mac_addr + '/' + df_name, {'json': {'data': data}, 'headers': _auth(password)}, lambda r: True
+
+def _pull(mac_addr, df_name, password=None):
+    return 'GET', '/' + mac_addr + '/' + df_name, {'headers': _auth(password)}, lambda r: r.json()['samples']
+
+def _changed(r):
+    if r.status_code == 304: return None, r.headers.get('ETag')
+    return r.json()['samples'], r.headers.get('ETag')
+
+def _pull_if_changed(mac_addr, df_name, etag, wait, password=None):
+    headers = _auth(password)
+    if etag: headers['If-None-Match'] = etag
+    kwargs = {'headers': headers}
+    if wait:
+        kwargs['params'] = {'wait': wait}
+        kwargs['timeout'] = TIMEOUT + wait  # the server may hold the request for up to wait seconds
+    return 'GET', '/' + mac_addr + '/' + df_name, kwargs, _changed, (200, 304)
+
+def _batch(mac_addr, pulls, pushes, password=None):
+    return 'POST', '/batch/' + mac_addr, {'json': {'pull': pulls, 'push': pushes}, 'headers': _auth(password)}, lambda r: r.json()['samples']
+
+def _get_alias(mac_addr, df_name):
+    return 'GET', '/get_alias/' + mac_addr + '/' + df_name, {}, lambda r: r.json()['alias_name']
+
+def _set_alias(mac_addr, df_name, s):
+    return 'GET', '/set_alias/' + mac_addr + '/' + df_name + '/alias', {'params': {'name': s}}, lambda r: True
+
+def _tree():
+    return 'GET', '/tree', {}, lambda r: r.json()
+
+
+def alive(url, timeout=TIMEOUT, UsingSession=IoTtalk):
+    # Liveness probe of a server other than ENDPOINT (e.g. a reconnect candidate)
+    return _send(_alive(), UsingSession, timeout, url)
+
+
+def register(mac_addr, profile, UsingSession=IoTtalk, timeout=None):
     global passwordKey
-    r = UsingSession.post(
-        ENDPOINT + '/' + mac_addr,
-        json={'profile': profile}, timeout=TIMEOUT
-    )
-    if r.status_code != 200: raise CSMError(r.text)
-    else: 
-        passwordKey = r.json().get('password')
-        d_name = r.json().get('d_name')
+    d_name, passwordKey = _send(_register(mac_addr, profile), UsingSession, timeout)
     return d_name
 
 
+def attach(mac_addr, profile, UsingSession=IoTtalk, timeout=None):
+    # register() for callers that manage several devices: returns (d_name, password)
+    # and leaves the module's passwordKey alone
+    return _send(_register(mac_addr, profile), UsingSession, timeout)
+
+
+def resume(mac_addr, password, UsingSession=IoTtalk, timeout=None):
+    # Reuse an earlier registration: returns the profile if the server still knows
+    # mac_addr and accepts password, raises CSMError (with status_code) if not
+    global passwordKey
+    passwordKey = password
+    return _send(_pull(mac_addr, 'profile'), UsingSession, timeout)
+
+
 def deregister(mac_addr, UsingSession=IoTtalk):
-    r = UsingSession.delete(ENDPOINT + '/' + mac_addr)
-    if r.status_code != 200: raise CSMError(r.text)
-    return True
+    return _send(_deregister(mac_addr), UsingSession)
 
 
-def push(mac_addr, df_name, data, UsingSession=IoTtalk):
-    r = UsingSession.put(
-        ENDPOINT + '/' + mac_addr + '/' + df_name,
-        json={'data': data},
-        timeout=TIMEOUT,
-        headers = {'password-key': passwordKey}
-    )
-    if r.status_code != 200: raise CSMError(r.text)
-    return True
+def push(mac_addr, df_name, data, UsingSession=IoTtalk, password=None):
+    return _send(_push(mac_addr, df_name, data, password), UsingSession)
+
+
+def pull(mac_addr, df_name, UsingSession=IoTtalk, password=None):
+    return _send(_pull(mac_addr, df_name, password), UsingSession)
+
 
+def pull_if_changed(mac_addr, df_name, etag=None, wait=0, UsingSession=IoTtalk, password=None):
+    # Conditional pull: returns (samples, etag), samples is None if nothing newer than etag.
+    # wait > 0 long-polls up to that many seconds for a newer sample.
+    # Servers without ETag support just answer 200 every time (etag None).
+    return _send(_pull_if_changed(mac_addr, df_name, etag, wait, password), UsingSession)
 
-def pull(mac_addr, df_name, UsingSession=IoTtalk):
-    r = UsingSession.get(
-        ENDPOINT + '/' + mac_addr + '/' + df_name,
-        timeout=TIMEOUT,
-        headers = {'password-key': passwordKey}
-    )
-    if r.status_code != 200: raise CSMError(r.text)
-    return r.json()['samples']
+
+_executor = None
+def _parallel(ops, UsingSession):
+    # Fallback for servers without the batch endpoint: one request per op, all in flight at once
+    global _executor
+    if len(ops) <= 1: return [_send(op, UsingSession) for op in ops]
+    if _executor is None: _executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='csmapi')
+    return list(_executor.map(_send, ops, [UsingSession] * len(ops)))
+
+def _send_batch(mac_addr, pulls, pushes, UsingSession, password=None):
+    # One round trip if the server has /batch (probed once), else None
+    global BATCH
+    if BATCH is False: return None
+    try:
+        result = _send(_batch(mac_addr, pulls, pushes, password), UsingSession)
+    except CSMError as e:
+        if BATCH or e.status_code not in (404, 405): raise
+        BATCH = False
+        return None
+    BATCH = True
+    return result
+
+
+def pull_many(mac_addr, df_names, UsingSession=IoTtalk, password=None):
+    # {df_name: samples} for several features in one round trip (or concurrently)
+    df_names = list(df_names)
+    if not df_names: return {}
+    result = _send_batch(mac_addr, df_names, {}, UsingSession, password)
+    if result is not None: return result
+    return dict(zip(df_names, _parallel([_pull(mac_addr, df, password) for df in df_names], UsingSession)))
+
+
+def push_many(mac_addr, data_by_df, UsingSession=IoTtalk, password=None):
+    # Push {df_name: data} in one round trip (or concurrently)
+    if not data_by_df: return True
+    if _send_batch(mac_addr, [], data_by_df, UsingSession, password) is not None: return True
+    _parallel([_push(mac_addr, df, data, password) for df, data in data_by_df.items()], UsingSession)
+    return True
 
 
 def get_alias(mac_addr, df_name, UsingSession=IoTtalk):
-    r = UsingSession.get(ENDPOINT + '/get_alias/' + mac_addr + '/' + df_name, timeout=TIMEOUT)
-    if r.status_code != 200: raise CSMError(r.text)
-    return r.json()['alias_name']
+    return _send(_get_alias(mac_addr, df_name), UsingSession)
+
 
-	
 def set_alias(mac_addr, df_name, s, UsingSession=IoTtalk):
-    r = UsingSession.get(ENDPOINT + '/set_alias/' + mac_addr + '/' + df_name + '/alias?name=' + s, timeout=TIMEOUT)
-    if r.status_code != 200: raise CSMError(r.text)
-    return True
+    return _send(_set_alias(mac_addr, df_name, s), UsingSession)
+
 
-	
 def tree(UsingSession=IoTtalk):
-    r = UsingSession.get(ENDPOINT + '/tree')
-    if r.status_code != 200: raise CSMError(r.text)
-    return r.json()
+    return _send(_tree(), UsingSession)
+
+
+class AsyncCSM:
+    """asyncio front end: calls run on a pooled keep-alive Session in worker
+    threads, so up to pool_size requests are in flight at once.
+
+        async with csmapi.AsyncCSM() as csm:
+            a, b = await asyncio.gather(csm.pull(mac, 'A'), csm.pull(mac, 'B', timeout=0.5))
+
+    timeout is a deadline for the awaiting coroutine: when it passes the call
+    raises CSMError, but the worker thread cannot be cancelled and runs on
+    until the request finishes or requests' own timeout (the same value,
+    applied to connect and to each socket read) expires, holding a pool
+    slot until then.
+    """
+    def __init__(self, pool_size=POOL_SIZE, timeout=TIMEOUT, session=None):
+        self.session = session if session is not None else make_session(pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='csmapi')
+        self.timeout = timeout
+
+    async def call(self, op, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        # requests' own timeout bounds each socket wait, wait_for bounds the total
+        future = loop.run_in_executor(self.executor, _send, op, self.session, timeout)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CSMError('deadline of {}s exceeded: {} {}'.format(timeout, op[0], op[1]))
+
+    async def register(self, mac_addr, profile, timeout=None):
+        global passwordKey
+        d_name, passwordKey = await self.call(_register(mac_addr, profile), timeout)
+        return d_name
+
+    def attach(self, mac_addr, profile, timeout=None):
+        return self.call(_register(mac_addr, profile), timeout)
+
+    def deregister(self, mac_addr, timeout=None):
+        return self.call(_deregister(mac_addr), timeout)
+
+    def push(self, mac_addr, df_name, data, timeout=None, password=None):
+        return self.call(_push(mac_addr, df_name, data, password), timeout)
+
+    def pull(self, mac_addr, df_name, timeout=None, password=None):
+        return self.call(_pull(mac_addr, df_name, password), timeout)
+
+    def pull_if_changed(self, mac_addr, df_name, etag=None, wait=0, timeout=None, password=None):
+        return self.call(_pull_if_changed(mac_addr, df_name, etag, wait, password), self.timeout + wait if timeout is None else timeout)
+
+    async def _send_batch(self, mac_addr, pulls, pushes, timeout, password=None):
+        global BATCH
+        if BATCH is False: return None
+        try:
+            result = await self.call(_batch(mac_addr, pulls, pushes, password), timeout)
+        except CSMError as e:
+            if BATCH or e.status_code not in (404, 405): raise
+            BATCH = False
+            return None
+        BATCH = True
+        return result
+
+    async def pull_many(self, mac_addr, df_names, timeout=None, password=None):
+        df_names = list(df_names)
+        if not df_names: return {}
+        result = await self._send_batch(mac_addr, df_names, {}, timeout, password)
+        if result is not None: return result
+        results = await asyncio.gather(*[self.pull(mac_addr, df, timeout, password) for df in df_names])
+        return dict(zip(df_names, results))
+
+    async def push_many(self, mac_addr, data_by_df, timeout=None, password=None):
+        if not data_by_df: return True
+        if await self._send_batch(mac_addr, [], data_by_df, timeout, password) is None:
+            await asyncio.gather(*[self.push(mac_addr, df, data, timeout, password) for df, data in data_by_df.items()])
+        return True
+
+    def get_alias(self, mac_addr, df_name, timeout=None):
+        return self.call(_get_alias(mac_addr, df_name), timeout)
+
+    def set_alias(self, mac_addr, df_name, s, timeout=None):
+        return self.call(_set_alias(mac_addr, df_name, s), timeout)
+
+    def tree(self, timeout=None):
+        return self.call(_tree(), timeout)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    async def __aenter__(self):
+        return self
 
-	
+    async def __aexit__(self, *exc):
+        self.close()
@@ -0,0 +1,144 @@
+"""
+Background discovery of local IoTtalk (EasyConnect) servers
+
+An EasyConnect server announces itself by broadcasting 'easyconnect' on UDP
+17000. ECDiscovery listens for those beacons in a daemon thread until a
+deadline, remembers every server for ttl seconds after its last beacon, and
+picks the fastest reachable server by probing all candidates at once (the
+first probe to answer is the lowest-latency one):
+
+    ec = ECDiscovery().start(10)          # listen for 10 s in the background
+    url = ec.best(['https://class.iottalk.tw'], timeout=2)   # None if nothing answered
+
+Nothing here blocks longer than the timeout it is given, and the UDP socket
+is closed when the listener's deadline passes or stop() is called.
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import csmapi
+
+BEACON = b'easyconnect'
+BEACON_PORT = 17000
+SERVER_PORT = 9999  # the CSM port of an EasyConnect server
+POLL = 0.05  # how often the listener checks its deadline / best() checks for new beacons
+
+
+class ECDiscovery:
+    def __init__(self, port=BEACON_PORT, ttl=30.0, server_port=SERVER_PORT, max_probes=8):
+        self.port = port
+        self.ttl = ttl  # seconds a server stays a candidate after its last beacon
+        self.server_port = server_port
+        self.max_probes = max_probes
+        self.endpoints = {}  # url -> monotonic time of its last beacon
+        self.latency = {}  # url -> seconds its last successful probe took
+        self.error = None  # OSError from the last failed bind, e.g. port in use
+        self.deadline = 0.0
+        self.thread = None
+        self.cond = threading.Condition()
+
+    @property
+    def listening(self):
+        return self.thread is not None
+
+    def start(self, duration=None):
+        """Listen for beacons for duration seconds from now (None = until stop());
+        calling it again while listening only extends the deadline."""
+        with self.cond:
+            until = float('inf') if duration is None else time.monotonic() + duration
+            self.deadline = max(self.deadline, until) if self.thread else until
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._listen, name='ec-discovery', daemon=True)
+                self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.deadline = 0.0
+            thread = self.thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _listen(self):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(('', self.port))
+            s.settimeout(POLL)
+            self.error = None
+            while True:
+                with self.cond:
+                    if time.monotonic() >= self.deadline:
+                        self.thread = None  # same lock as start(), so a late start() spawns a new listener
+                        self.cond.notify_all()
+                        return
+                try:
+                    data, addr = s.recvfrom(1024)
+                except socket.timeout:
+                    continue
+                if data == BEACON:
+                    self.found('http://{}:{}'.format(addr[0], self.server_port))
+        except OSError as e:
+            self.error = e
+            with self.cond:
+                self.thread = None
+                self.cond.notify_all()
+        finally:
+            s.close()
+
+    def found(self, url):
+        with self.cond:
+            self.endpoints[url] = time.monotonic()
+            self.cond.notify_all()
+
+    def fresh(self):
+        """Servers seen within ttl, most recent beacon first; expired ones are forgotten."""
+        with self.cond:
+            now = time.monotonic()
+            for url in [u for u, seen in self.endpoints.items() if now - seen > self.ttl]:
+                del self.endpoints[url]
+            return sorted(self.endpoints, key=self.endpoints.get, reverse=True)
+
+    def wait(self, timeout):
+        """Block up to timeout seconds for at least one fresh server; returns fresh()."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.fresh() or not self.listening, timeout)
+        return self.fresh()
+
+    def probe(self, url, timeout):
+        start = time.perf_counter()
+        csmapi.alive(url, timeout)
+        self.latency[url] = time.perf_counter() - start
+        return url
+
+    def best(self, candidates=(), timeout=2.0, local=True):
+        """The first of candidates (plus discovered servers if local) to answer a
+        liveness probe within timeout, or None. Beacons that arrive while waiting
+        join the race."""
+        deadline = time.monotonic() + timeout
+        probed, pending = set(), set()
+        pool = ThreadPoolExecutor(max_workers=self.max_probes, thread_name_prefix='ec-probe')
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                for url in list(candidates) + (self.fresh() if local else []):
+                    if url not in probed:
+                        probed.add(url)
+                        pending.add(pool.submit(self.probe, url, remaining))
+                if not pending:
+                    if not (local and self.listening):
+                        return None  # nothing left to probe and no beacon can arrive
+                    with self.cond:
+                        self.cond.wait(min(remaining, POLL))
+                    continue
+                done, pending = wait(pending, min(remaining, POLL), FIRST_COMPLETED)
+                for f in done:
+                    if f.exception() is None:
+                        return f.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)  # slower probes end on their own timeout
@@ -0,0 +1,149 @@
+"""
+Headless deterministic simulation of Sky Fighter.
+
+Runs Game.World without a window or an IoTtalk link: SDL uses the dummy
+video driver, all randomness is seeded, and the tilt comes from a scripted
+pattern instead of the phone. The loop runs as fast as possible and reports
+simulated frames/sec, per-stage timings and entity counts over time.
+
+Usage: python headless.py [--steps N] [--seed S] [--tilt sweep|still|random]
+                          [--replay FILE.tilt] [--enemies N] [--no-render]
+"""
+
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import math
+import random
+import time
+
+import pygame
+
+import Game
+from profiler import FrameProfiler
+from tilt_record import TiltPlayback, to_payload
+
+SAMPLE_EVERY = 120  # steps between entity-count samples (1 s at 120 Hz)
+
+
+def scripted_tilt(name, seed=0):
+    """Return a function mapping simulated time (s) to a tilt in -10..10."""
+    if name == 'still':
+        return lambda t: 0.0
+    if name == 'sweep':
+        return lambda t: 8.0 * math.sin(t * 1.5)
+    if name == 'random':
+        rng = random.Random(seed)
+        state = {'tilt': 0.0}
+
+        def walk(t):
+            state['tilt'] = max(-10.0, min(10.0, state['tilt'] + rng.uniform(-0.6, 0.6)))
+            return state['tilt']
+        return walk
+    raise ValueError(f'unknown tilt pattern: {name}')
+
+
+def replay_tilt(path):
+    """Tilt function that replays a tilt_record file against simulated time
+    (looping), mapped through Game.map_tilt like live samples."""
+    playback = TiltPlayback(path)
+    duration = playback.duration
+
+    def at(t):
+        sample = playback.sample_at(t % duration if duration > 0 else t)
+        return Game.map_tilt(to_payload(*sample[1:])) if sample is not None else 0.0
+    return at
+
+
+def run(steps=6000, seed=0, tilt='sweep', enemies=6, stars=Game.STAR_COUNT,
+        render=True, dirty=False, bursts_per_step=0, invincible=True):
+    """Simulate `steps` fixed steps and return a result dict."""
+    pygame.init()
+    screen = pygame.display.get_surface() or pygame.display.set_mode((Game.WIDTH, Game.HEIGHT))
+    Game.get_sprite_cache()
+    random.seed(seed)
+    tilt_at = scripted_tilt(tilt, seed) if isinstance(tilt, str) else tilt
+
+    world = Game.World(enemies=enemies, stars=stars)
+    profiler = FrameProfiler(capacity=max(1, steps))
+    world.profiler = profiler
+    renderer = Game.DirtyRenderer(screen) if dirty else Game.FullRenderer(screen)
+    hud = Game.HUD(pygame.font.Font(None, 36))
+    render_every = max(1, round(Game.PHYSICS_HZ / Game.FPS))
+
+    deaths = 0
+    samples = []
+    start = time.perf_counter()
+    for i in range(steps):
+        profiler.begin_frame()
+        Game.current_tilt = tilt_at(world.time)
+        profiler.lap('input')
+        for _ in range(bursts_per_step):
+            world.particles.burst(random.randrange(Game.WIDTH), random.randrange(Game.HEIGHT),
+                                  Game.C_NEON_PINK, 15, 5, 30)
+        if not world.step():
+            deaths += 1
+            if not invincible:
+                break
+            world.running = True
+        if render and i % render_every == 0:
+            renderer.clear()
+            profiler.lap('clear')
+            rects = world.draw(screen, 1.0, renderer.dirty)
+            rects.append(hud.draw(screen, world.score, int(world.time), Game.current_tilt))
+            profiler.lap('hud')
+            renderer.present(rects)
+            profiler.lap('flip')
+        profiler.end_frame()
+        if i % SAMPLE_EVERY == 0:
+            samples.append((i, len(world.mobs), len(world.bullets), len(world.particles)))
+    elapsed = time.perf_counter() - start
+
+    summary = profiler.summary()
+    return {
+        'steps': profiler.total,
+        'seconds': elapsed,
+        'steps_per_sec': profiler.total / elapsed if elapsed else 0.0,
+        'sim_seconds': world.time,
+        'score': world.score,
+        'deaths': deaths,
+        'step_p50_ms': summary['p50'],
+        'step_p95_ms': summary['p95'],
+        'step_p99_ms': summary['p99'],
+        'stages_ms': summary['stages'],
+        'entities': samples,
+        'pools': world.pool_stats(),
+    }
+
+
+def print_result(result):
+    print(f"steps: {result['steps']}  wall: {result['seconds']:.2f}s  "
+          f"=> {result['steps_per_sec']:.0f} steps/s ({result['sim_seconds']:.1f}s simulated)")
+    print(f"score: {result['score']}  deaths: {result['deaths']}")
+    print(f"step p50/p95/p99: {result['step_p50_ms']:.3f} / {result['step_p95_ms']:.3f} / {result['step_p99_ms']:.3f} ms")
+    for stage, ms in result['stages_ms'].items():
+        print(f"  {stage:<10} {ms:8.4f} ms/step")
+    print('entities (step, mobs, bullets, particles):')
+    for row in result['entities'][::max(1, len(result['entities']) // 10)]:
+        print(f'  {row}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless Sky Fighter simulation')
+    parser.add_argument('--steps', type=int, default=6000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tilt', default='sweep', choices=['sweep', 'still', 'random'])
+    parser.add_argument('--replay', help='drive the tilt from a tilt_record file instead of --tilt')
+    parser.add_argument('--enemies', type=int, default=6)
+    parser.add_argument('--no-render', action='store_true')
+    parser.add_argument('--dirty', action='store_true')
+    args = parser.parse_args()
+    tilt = replay_tilt(args.replay) if args.replay else args.tilt
+    print_result(run(args.steps, args.seed, tilt, args.enemies,
+                     render=not args.no_render, dirty=args.dirty))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+DeviceHub: many IoTtalk devices (DAN.DeviceSession) served by one process
+
+One hub holds a shared keep-alive connection pool, a bounded worker pool and
+optionally a single MQTT connection, and multiplexes every session over them:
+
+    hub = DeviceHub(on_data=handle)                 # handle(session, FEATURE_NAME, data)
+    for i in range(40):
+        hub.open({'dm_name': 'Dummy_Device', 'df_list': ['Dummy_Sensor', 'Dummy_Control']},
+                 'CABINET{:02d}'.format(i), odf_list=['Dummy_Control'])
+    hub.connect_mqtt('127.0.0.1', 1883)             # optional: all sessions on one connection
+    hub.start()
+    hub.push(session, 'Dummy_Sensor', [1, 2, 3])
+
+Over HTTP one poller thread runs a conditional pull of each ODF of every
+session every poll_interval, and of __Ctl_O__ every control_interval
+(unchanged features cost an empty 304).
+With MQTT, every session's ODFs and __Ctl_O__ are subscribed on the one
+connection and dispatched by topic; HTTP polling then only runs while the
+connection is down. All sessions talk to csmapi.ENDPOINT.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime as dt
+
+import csmapi
+import DAN
+
+CONTROL_OUT = '__Ctl_O__'
+SUBSCRIBE_CHUNK = 100  # topics per SUBSCRIBE packet
+
+
+class DeviceHub:
+    def __init__(self, on_data=None, pool_size=32, workers=16, poll_interval=0.05, control_interval=1.0):
+        self.on_data = on_data  # callback(session, FEATURE_NAME, data) for every new ODF sample
+        self.http = csmapi.make_session(pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hub')
+        self.poll_interval = poll_interval  # ODF polling period
+        self.control_interval = control_interval  # __Ctl_O__ changes rarely, poll it less often
+        self.control_due = 0.0
+        self.sessions = {}  # mac -> DeviceSession
+        self.odfs = {}  # mac -> ODF names delivered to on_data
+        self.lock = threading.Lock()
+        self.mqtt = None
+        self.mqtt_link = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.stats = {'cycles': 0, 'requests': 0, 'delivered': 0, 'commands': 0,
+                      'errors': 0, 'reregistered': 0, 'cycle_time': 0.0}
+        self.stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    # --- sessions ---
+    def open(self, profile, mac, odf_list=()):
+        """Register a new device and serve it; returns its DAN.DeviceSession."""
+        session = DAN.DeviceSession(profile, mac, self.http)
+        session.register()
+        with self.lock:
+            self.sessions[mac] = session
+            self.odfs[mac] = list(odf_list)
+        if self.mqtt_link.is_set():
+            self.mqtt.subscribe(self._topics(mac))
+        return session
+
+    def open_many(self, specs):
+        """open() for many (profile, mac, odf_list) at once, registering concurrently."""
+        return list(self.executor.map(lambda spec: self.open(*spec), specs))
+
+    def close(self, mac):
+        with self.lock:
+            topics = [topic for topic, qos in self._topics(mac)]  # before odfs loses the ODF names
+            session = self.sessions.pop(mac, None)
+            self.odfs.pop(mac, None)
+        if session is None:
+            return False
+        if self.mqtt_link.is_set():
+            self.mqtt.unsubscribe(topics)
+        return session.deregister()
+
+    def close_all(self):
+        list(self.executor.map(self.close, list(self.sessions)))
+
+    def push(self, session, FEATURE_NAME, data):
+        """Send an IDF sample: published on the shared MQTT connection when it is up, else HTTP."""
+        if session.state != 'RESUME':
+            return None
+        if self.mqtt_link.is_set():
+            payload = json.dumps({'samples': [[str(dt.now()), data]]})
+            return self.mqtt.publish('{}//{}'.format(session.MAC, FEATURE_NAME), payload)
+        self._count('requests')
+        return session.push(FEATURE_NAME, data)
+
+    def _deliver(self, session, FEATURE_NAME, data):
+        if data is None:
+            return
+        self._count('delivered')
+        if self.on_data:
+            self.on_data(session, FEATURE_NAME, data)
+
+    # --- HTTP polling ---
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._poll_loop, name='hub-poll', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, deregister=True):
+        """Stop serving; deregisters every session unless deregister=False."""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        if self.mqtt:
+            self.mqtt.loop_stop()
+            self.mqtt.disconnect()
+            self.mqtt_link.clear()
+        if deregister:
+            self.close_all()
+        self.executor.shutdown(wait=False)
+
+    def _poll_loop(self):
+        while not self.stop_event.is_set():
+            start = time.monotonic()
+            if not self.mqtt_link.is_set():
+                self.poll_once()
+            elapsed = time.monotonic() - start
+            with self.stats_lock:
+                self.stats['cycle_time'] = elapsed
+            self.stop_event.wait(max(0.0, self.poll_interval - elapsed))
+
+    def poll_once(self):
+        """One conditional pull of every ODF (and __Ctl_O__ when due) of every session, concurrently."""
+        with self.lock:
+            sessions = list(self.sessions.values())
+        control = time.monotonic() >= self.control_due
+        if control:
+            self.control_due = time.monotonic() + self.control_interval
+        wait([self.executor.submit(self._poll_session, s, control) for s in sessions])
+        self._count('cycles')
+
+    def _poll_session(self, session, control=True):
+        try:
+            if control:
+                self._count('requests')
+                if session.poll_control():
+                    self._count('commands')
+            for odf in self.odfs.get(session.MAC, ()):
+                self._count('requests')
+                self._deliver(session, odf, session.pull(odf))
+        except csmapi.CSMError as e:
+            self._count('errors')
+            if e.status_code == 404:  # the server forgot this device (e.g. restarted)
+                try:
+                    session.register()
+                except Exception:
+                    self._count('errors')  # still unreachable, the next poll tries again
+                else:
+                    self._count('reregistered')
+        except Exception:
+            self._count('errors')
+
+    # --- MQTT ---
+    def connect_mqtt(self, broker, port=1883, user=None, password=None, encryption=False):
+        """Carry every session on one MQTT connection (paho network thread, auto reconnect)."""
+        import paho.mqtt.client as mqtt
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        client.username_pw_set(user, password)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        if encryption:
+            client.tls_set()
+        self.mqtt = client
+        client.connect_async(broker, port, keepalive=60)
+        client.loop_start()
+        return client
+
+    def _topics(self, mac):
+        return [('{}//{}'.format(mac, df), 0) for df in [CONTROL_OUT] + self.odfs.get(mac, [])]
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            return
+        with self.lock:
+            topics = [t for mac in self.sessions for t in self._topics(mac)]
+        for i in range(0, len(topics), SUBSCRIBE_CHUNK):
+            client.subscribe(topics[i:i + SUBSCRIBE_CHUNK])
+        self.mqtt_link.set()
+
+    def _on_disconnect(self, client, userdata, disconnect_flags, reason_code, properties):
+        self.mqtt_link.clear()  # HTTP polling takes over until paho reconnects
+
+    def _on_message(self, client, userdata, msg):
+        mac, _, FEATURE_NAME = msg.topic.partition('//')
+        session = self.sessions.get(mac)
+        if session is None:
+            return
+        try:
+            samples = json.loads(msg.payload)['samples']
+            if FEATURE_NAME == CONTROL_OUT:
+                if session.handle_control(samples):
+                    self._count('commands')
+            elif session.state == 'RESUME':
+                self._deliver(session, FEATURE_NAME, session.new_sample(FEATURE_NAME, samples))
+        except Exception:
+            self._count('errors')
@@ -0,0 +1,114 @@
+"""
+Single-producer / single-consumer input channel.
+
+The producer (an IoTtalk listener thread) pushes timestamped samples into a
+fixed-size ring; the consumer (the render loop) reads the latest sample, its
+age, and every sample that arrived since its last read. No lock is taken:
+the producer fills a slot before publishing the new write sequence, and the
+consumer re-checks the sequence after copying to discard slots that were
+overwritten meanwhile. Those, and samples the producer lapped before the
+consumer got to them, are counted as dropped.
+"""
+
+import time
+
+
+class InputChannel:
+    def __init__(self, capacity=256, stale_after=0.5, clock=time.monotonic):
+        self.capacity = capacity
+        self.stale_after = stale_after  # seconds without a sample before input counts as stale
+        self.clock = clock
+        self.times = [0.0] * capacity
+        self.values = [0.0] * capacity
+        self.write_seq = 0  # only the producer writes this
+        self.read_seq = 0  # only the consumer writes this
+        # consumer-side counters
+        self.dropped = 0
+        self.stale_reads = 0
+        self.delivered = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    # --- producer ---
+    def push(self, value, t=None):
+        seq = self.write_seq
+        i = seq % self.capacity
+        self.times[i] = self.clock() if t is None else t
+        self.values[i] = value
+        self.write_seq = seq + 1  # publish after the slot is filled
+
+    # --- consumer ---
+    def latest(self):
+        """Most recent (timestamp, value), or None if nothing arrived yet."""
+        seq = self.write_seq
+        if seq == 0:
+            return None
+        i = (seq - 1) % self.capacity
+        return self.times[i], self.values[i]
+
+    def age(self, now=None):
+        """Seconds since the latest sample arrived (inf if none yet)."""
+        sample = self.latest()
+        if sample is None:
+            return float('inf')
+        return (self.clock() if now is None else now) - sample[0]
+
+    def is_stale(self, now=None):
+        return self.age(now) > self.stale_after
+
+    def drain(self, now=None):
+        """Samples that arrived since the previous drain, oldest first."""
+        end = self.write_seq
+        start = self.read_seq
+        if end - start > self.capacity:
+            self.dropped += end - start - self.capacity
+            start = end - self.capacity
+        cap = self.capacity
+        samples = [(self.times[s % cap], self.values[s % cap]) for s in range(start, end)]
+        # The producer may have lapped the oldest slots while we copied them;
+        # slot write_seq % cap may be mid-write too, so count it as lost
+        overwritten = self.write_seq + 1 - cap - start
+        if overwritten > 0:
+            self.dropped += overwritten
+            samples = samples[overwritten:]
+        self.read_seq = end
+
+        now = self.clock() if now is None else now
+        if samples:
+            self.delivered += len(samples)
+            for t, _ in samples:
+                latency = now - t
+                self.latency_sum += latency
+                if latency > self.latency_max:
+                    self.latency_max = latency
+        elif end and now - self.times[(end - 1) % cap] > self.stale_after:
+            self.stale_reads += 1
+        return samples
+
+    def value_at(self, t, default=0.0):
+        """Linearly interpolate the value at time t from the buffered samples."""
+        end = self.write_seq
+        if end == 0:
+            return default
+        cap = self.capacity
+        start = max(0, end - cap + 1)
+        newer = None
+        for s in range(end - 1, start - 1, -1):
+            st, sv = self.times[s % cap], self.values[s % cap]
+            if st <= t:
+                if newer is None:
+                    return sv  # t is past the newest sample: hold it
+                nt, nv = newer
+                return sv + (nv - sv) * (t - st) / (nt - st) if nt > st else nv
+            newer = (st, sv)
+        return newer[1]  # t is older than everything buffered
+
+    def stats(self):
+        return {
+            'received': self.write_seq,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'stale_reads': self.stale_reads,
+            'latency_avg_ms': self.latency_sum / self.delivered * 1000 if self.delivered else 0.0,
+            'latency_max_ms': self.latency_max * 1000,
+        }
@@ -0,0 +1,653 @@
+"""
+Local stand-in for the IoTtalk CSM (REST API + MQTT broker), for offline
+tests, benchmarks and load tests of many simulated phones and games.
+
+    csm = MockCSM(latency=0.02, jitter=0.01, loss=0.01).start()
+    broker = csm.start_broker()                     # optional MQTT shim
+    csmapi.ENDPOINT = csm.url
+    csm.link('PHONE1', 'Gyroscope', DAN.MAC, 'Dummy_Control')
+    csm.feed(DAN.MAC, 'Dummy_Control', [[0.0, 0.0, 5.0]])   # deliver directly
+    csm.synthesize('Dummy_Control', 50)    # a 50 Hz phone for every device with that feature
+    ...
+    csm.stop()
+
+or standalone (then point Game.py / SA.py at it, see README):
+
+    python mock_csm.py --port 9999 --mqtt-port 1883 --link '*/Gyroscope=*/Dummy_Control'
+
+REST endpoints (same paths as csmapi):
+    GET    /                              liveness (Agent.IsServerAlive)
+    POST   /<mac>                         register, returns d_name and password
+    DELETE /<mac>                         deregister
+    PUT    /<mac>/<df>                    push {'data': [...]}, routed over links
+    GET    /<mac>/<df>                    pull the newest samples, newest first
+    GET    /<mac>/profile                 the registered profile (DAN control channel)
+    POST   /batch/<mac>                   {'pull': [df, ...], 'push': {df: data}} in one
+                                          round trip, returns {'samples': {df: samples}}
+                                          (404 when created with batch=False, like the real CSM)
+    GET    /get_alias/<mac>/<df>          {'alias_name': ...}
+    GET    /set_alias/<mac>/<df>/alias?name=...
+    GET    /tree                          registered devices
+
+Samples are stored per (mac, feature). A push is stored under the pushing
+device and copied to every linked (mac, feature); control commands are
+queued with control() on __Ctl_O__. Pulls support conditional requests: each
+response carries an ETag for the newest sample, a request with a matching
+If-None-Match gets an empty 304, and ?wait=S turns that into a long poll
+that blocks up to S seconds for a newer sample first.
+
+Fault injection applies to every HTTP response and every MQTT delivery:
+latency (fixed seconds), jitter (mean of an exponential extra delay), loss
+(probability the connection is dropped / the message is lost) and
+error_rate (probability of an HTTP 503).
+"""
+
+import argparse
+import heapq
+import json
+import math
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MAX_WAIT = 30.0  # longest long-poll a client may ask for
+CONTROL_OUT = '__Ctl_O__'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real server behind nginx
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.csm.connections.add(self.connection)
+
+    def finish(self):
+        self.server.csm.connections.discard(self.connection)
+        super().finish()
+
+    def _reply(self, status, body=None, headers=()):
+        csm = self.server.csm
+        delay, fate = csm.fault()
+        if delay:
+            time.sleep(delay)
+        if fate == 'lost':
+            self.close_connection = True  # the client sees the connection reset
+            csm._count('lost', 0)
+            return
+        if fate == 'error':
+            status, body, headers = 503, {'error': 'injected failure'}, ()
+        payload = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        for k, v in headers:
+            self.send_header(k, v)
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        csm._count(status, len(payload))
+
+    def _not_found(self, mac=None):
+        if mac is not None:
+            return self._reply(404, {'error': 'mac_addr not found: {}'.format(mac)})
+        return self._reply(404, {'error': 'not found'})
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _parts(self):
+        url = urlsplit(self.path)
+        return [p for p in url.path.split('/') if p], parse_qs(url.query)
+
+    def do_POST(self):
+        csm = self.server.csm
+        parts, _ = self._parts()
+        body = self._body()  # always consume it, or the next keep-alive request breaks
+        if len(parts) == 2 and parts[0] == 'batch' and csm.batch:
+            if not csm.registered(parts[1]):
+                return self._not_found(parts[1])
+            samples = csm.batch_call(parts[1], body.get('pull', []), body.get('push', {}))
+            return self._reply(200, {'samples': samples})
+        if len(parts) != 1:
+            return self._not_found()
+        self._reply(200, csm.register(parts[0], body.get('profile', {})))
+
+    def do_DELETE(self):
+        parts, _ = self._parts()
+        if len(parts) != 1 or not self.server.csm.deregister(parts[0]):
+            return self._not_found(parts[-1] if parts else '')
+        self._reply(200, {'result': 'ok'})
+
+    def do_PUT(self):
+        csm = self.server.csm
+        parts, _ = self._parts()
+        body = self._body()
+        if len(parts) != 2:
+            return self._not_found()
+        if not csm.registered(parts[0]):
+            return self._not_found(parts[0])
+        csm.push(parts[0], parts[1], body.get('data'))
+        self._reply(200, {'result': 'ok'})
+
+    def do_GET(self):
+        csm = self.server.csm
+        parts, query = self._parts()
+        if not parts:
+            return self._reply(200, {'server': 'mock_csm'})
+        if parts == ['tree']:
+            return self._reply(200, csm.tree())
+        if parts[0] == 'get_alias' and len(parts) == 3:
+            return self._reply(200, {'alias_name': csm.get_alias(parts[1], parts[2])})
+        if parts[0] == 'set_alias' and len(parts) == 4:
+            csm.set_alias(parts[1], parts[2], query.get('name', [''])[0])
+            return self._reply(200, {'result': 'ok'})
+        if len(parts) != 2:
+            return self._not_found()
+        mac, df_name = parts
+        if not csm.registered(mac):
+            return self._not_found(mac)
+        if df_name == 'profile':
+            return self._reply(200, {'samples': csm.devices[mac]})
+        wait = min(float(query.get('wait', ['0'])[0]), MAX_WAIT)
+        etag, samples = csm.pull(mac, df_name, self.headers.get('If-None-Match'), wait)
+        if samples is None:
+            return self._reply(304, headers=[('ETag', etag)])
+        self._reply(200, {'samples': samples}, [('ETag', etag)] if etag else ())
+
+
+class MockCSM:
+    def __init__(self, host='127.0.0.1', port=0, history=5, latency=0.0, jitter=0.0,
+                 loss=0.0, error_rate=0.0, batch=True, seed=None):
+        self.history = history  # samples kept (and returned) per feature
+        self.latency = latency  # seconds added before every response / delivery
+        self.jitter = jitter  # mean of the extra exponential delay
+        self.loss = loss  # probability a response / MQTT message is dropped
+        self.error_rate = error_rate  # probability of an HTTP 503
+        self.batch = batch  # serve /batch/<mac>
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.devices = {}  # mac -> profile
+        self.aliases = {}  # (mac, df_name) -> alias
+        self.links = []  # (src_mac, src_df, dst_mac, dst_df); mac '*' = any registered device
+        self.features = {}  # (mac, df_name) -> deque of [timestamp, data], newest first
+        self.seq = {}  # (mac, df_name) -> number of samples ever stored (the ETag)
+        self.cond = threading.Condition()
+        self.stats = {'requests': 0, 'not_modified': 0, 'bytes_sent': 0, 'lost': 0, 'errors': 0}
+        self.stats_lock = threading.Lock()
+        self.connections = set()  # open client sockets, cut by drop_connections()
+        self.server = ThreadingHTTPServer((host, port), _Handler)
+        self.server.daemon_threads = True
+        self.server.csm = self
+        self.thread = None
+        self.broker = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def start_broker(self, host='127.0.0.1', port=0):
+        """Start an MQTT broker shim bridged to this CSM (mac//df topics)."""
+        self.broker = MockBroker(host, port, csm=self).start()
+        return self.broker
+
+    def stop(self):
+        if self.broker:
+            self.broker.stop()
+        self.server.shutdown()
+        self.server.server_close()
+        self.drop_connections()  # like a real restart, keep-alive clients lose their connection too
+
+    def drop_connections(self):
+        """Reset every open client connection (a network blip); the server keeps running."""
+        for conn in list(self.connections):
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- fault injection ---
+    def fault(self):
+        """(delay, fate) for one response; fate is None, 'lost' or 'error'."""
+        if not (self.latency or self.jitter or self.loss or self.error_rate):
+            return 0.0, None
+        with self.rng_lock:
+            delay = self.latency + (self.rng.expovariate(1 / self.jitter) if self.jitter else 0.0)
+            r = self.rng.random()
+        if r < self.loss:
+            return delay, 'lost'
+        if r < self.loss + self.error_rate:
+            return delay, 'error'
+        return delay, None
+
+    def _count(self, status, nbytes):
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_sent'] += nbytes
+            if status == 304:
+                self.stats['not_modified'] += 1
+            elif status == 'lost':
+                self.stats['lost'] += 1
+            elif status == 503:
+                self.stats['errors'] += 1
+
+    # --- CSM behaviour, also callable in-process ---
+    def register(self, mac, profile):
+        with self.cond:
+            self.devices[mac] = profile
+        return {'d_name': profile.get('d_name') or 'Mock_' + mac[-4:], 'password': 'mock-' + mac}
+
+    def deregister(self, mac):
+        with self.cond:
+            return self.devices.pop(mac, None) is not None
+
+    def registered(self, mac):
+        return mac in self.devices
+
+    def link(self, src_mac, src_df, dst_mac, dst_df):
+        """Route pushes of src_df by src_mac to dst_df of dst_mac ('*' = any)."""
+        with self.cond:
+            self.links.append((src_mac, src_df, dst_mac, dst_df))
+
+    def _targets(self, mac, df_name):
+        for src_mac, src_df, dst_mac, dst_df in self.links:
+            if src_df != df_name or src_mac not in ('*', mac):
+                continue
+            if dst_mac != '*':
+                yield dst_mac, dst_df
+                continue
+            for other, profile in self.devices.items():
+                if other != mac and dst_df in profile.get('df_list', ()):
+                    yield other, dst_df
+
+    def _store(self, key, sample):
+        samples = self.features.get(key)
+        if samples is None:
+            samples = self.features[key] = deque(maxlen=self.history)
+        samples.appendleft(sample)
+        self.seq[key] = self.seq.get(key, 0) + 1
+
+    def push(self, mac, df_name, data, publish=True):
+        """Store a sample from (mac, df_name) and route it over the links.
+        publish=False when it arrived over MQTT and the broker already has it."""
+        sample = [str(datetime.now()), data]
+        with self.cond:
+            keys = [(mac, df_name)] + list(self._targets(mac, df_name))
+            for key in keys:
+                self._store(key, sample)
+            self.cond.notify_all()
+        if self.broker:
+            for key in keys if publish else keys[1:]:
+                self.broker.publish('{}//{}'.format(*key), json.dumps({'samples': [sample]}).encode())
+
+    def feed(self, mac, df_name, data):
+        """Deliver a sample straight to (mac, df_name), as if a linked device pushed it."""
+        self.push(mac, df_name, data)
+
+    def control(self, mac, cmd, *cmd_params):
+        """Queue a control command (RESUME / SUSPEND / SET_DF_STATUS '101') for mac."""
+        self.feed(mac, CONTROL_OUT, [cmd, {'cmd_params': list(cmd_params)}])
+
+    def synthesize(self, df_name, rate):
+        """Stand-in for one phone per device: every registered device with df_name in
+        its profile gets [alpha, beta, gamma, time.time()] rate times a second (the
+        last field lets load tests measure delivery latency). Returns a stop Event."""
+        stop = threading.Event()
+
+        def run():
+            start = time.monotonic()
+            tick = 0
+            while not stop.is_set():
+                gamma = 30.0 * math.sin(tick / rate)
+                with self.cond:
+                    macs = [mac for mac, p in self.devices.items() if df_name in p.get('df_list', ())]
+                for mac in macs:
+                    self.push(mac, df_name, [0.0, 0.0, gamma, time.time()])
+                tick += 1
+                stop.wait(max(0.0, start + tick / rate - time.monotonic()))
+
+        threading.Thread(target=run, name='mock-phones', daemon=True).start()
+        return stop
+
+    def batch_call(self, mac, pulls, pushes):
+        for df_name, data in pushes.items():
+            self.push(mac, df_name, data)
+        return {df_name: self.pull(mac, df_name)[1] for df_name in pulls}
+
+    def _etag(self, key):
+        return '"{}"'.format(self.seq.get(key, 0))  # "0" = nothing yet, still long-pollable
+
+    def pull(self, mac, df_name, if_none_match=None, wait=0.0):
+        """(etag, samples); samples is None when if_none_match is still current."""
+        key = (mac, df_name)
+        deadline = time.monotonic() + wait
+        with self.cond:
+            while if_none_match is not None and self._etag(key) == if_none_match:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return if_none_match, None
+                self.cond.wait(remaining)
+            return self._etag(key), list(self.features.get(key, ()))
+
+    def get_alias(self, mac, df_name):
+        return self.aliases.get((mac, df_name), df_name)
+
+    def set_alias(self, mac, df_name, alias):
+        self.aliases[(mac, df_name)] = alias
+
+    def tree(self):
+        with self.cond:
+            return [{'mac_addr': mac, 'd_name': p.get('d_name'), 'dm_name': p.get('dm_name'),
+                     'df_list': p.get('df_list', [])} for mac, p in self.devices.items()]
+
+
+# --- MQTT broker shim ---
+# Enough of MQTT 3.1.1 / 5 for paho clients: CONNECT, SUBSCRIBE, UNSUBSCRIBE,
+# PUBLISH (QoS 0-2 in, always delivered at QoS 0), PINGREQ, DISCONNECT.
+# No TLS, no auth, no retained messages or wills.
+
+def _mqtt_string(data, i):
+    n = struct.unpack_from('!H', data, i)[0]
+    return data[i + 2:i + 2 + n].decode(), i + 2 + n
+
+
+def _mqtt_varint(data, i):
+    value, shift = 0, 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, i
+
+
+def _mqtt_packet(first, body):
+    length, out = len(body), bytearray([first])
+    while True:
+        byte, length = length % 128, length // 128
+        out.append(byte | (0x80 if length else 0))
+        if not length:
+            return bytes(out) + body
+
+
+def topic_matches(pattern, topic):
+    p, t = pattern.split('/'), topic.split('/')
+    for i, level in enumerate(p):
+        if level == '#':
+            return True
+        if i >= len(t) or (level != '+' and level != t[i]):
+            return False
+    return len(p) == len(t)
+
+
+class _MQTTSession(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.broker = self.server.broker
+        self.v5 = False
+        self.subscriptions = set()
+        self.queue = []  # heap of (due, seq, packet)
+        self.queue_cond = threading.Condition()
+        self.seq = 0
+        self.closed = False
+        threading.Thread(target=self._sender, daemon=True).start()
+
+    def _recv_exact(self, n):
+        data = b''
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError('closed')
+            data += chunk
+        return data
+
+    def _read_packet(self):
+        first = self._recv_exact(1)[0]
+        length, shift = 0, 0
+        while True:
+            byte = self._recv_exact(1)[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        return first, self._recv_exact(length) if length else b''
+
+    def send(self, packet, delay=0.0):
+        # Packets go out from a per-client thread at their due time, so an
+        # injected delay holds up neither the reader nor other clients
+        with self.queue_cond:
+            self.seq += 1
+            heapq.heappush(self.queue, (time.monotonic() + delay, self.seq, packet))
+            self.queue_cond.notify()
+
+    def _sender(self):
+        while True:
+            with self.queue_cond:
+                while not self.closed and (not self.queue or self.queue[0][0] > time.monotonic()):
+                    self.queue_cond.wait(self.queue[0][0] - time.monotonic() if self.queue else None)
+                if self.closed:
+                    return
+                _, _, packet = heapq.heappop(self.queue)
+            try:
+                self.request.sendall(packet)
+            except OSError:
+                return
+
+    def _properties(self, body, i):
+        # MQTT 5 packets carry a properties block; skip it
+        if not self.v5:
+            return i
+        length, i = _mqtt_varint(body, i)
+        return i + length
+
+    def handle(self):
+        try:
+            while True:
+                first, body = self._read_packet()
+                kind = first >> 4
+                if kind == 1:  # CONNECT
+                    _, i = _mqtt_string(body, 0)
+                    self.v5 = body[i] == 5
+                    self.send(_mqtt_packet(0x20, b'\x00\x00\x00' if self.v5 else b'\x00\x00'))
+                    self.broker._attach(self)
+                elif kind == 3:  # PUBLISH
+                    qos = (first >> 1) & 3
+                    topic, i = _mqtt_string(body, 0)
+                    if qos:
+                        pid, i = body[i:i + 2], i + 2
+                    i = self._properties(body, i)
+                    self.broker.receive(topic, body[i:])
+                    if qos == 1:
+                        self.send(_mqtt_packet(0x40, pid))
+                    elif qos == 2:
+                        self.send(_mqtt_packet(0x50, pid))
+                elif kind == 6:  # PUBREL
+                    self.send(_mqtt_packet(0x70, body[:2]))
+                elif kind == 8:  # SUBSCRIBE
+                    pid = body[:2]
+                    i = self._properties(body, 2)
+                    granted = bytearray()
+                    while i < len(body):
+                        topic, i = _mqtt_string(body, i)
+                        i += 1  # requested options; everything is delivered at QoS 0
+                        self.broker.subscribe(self, topic)
+                        granted.append(0)
+                    self.send(_mqtt_packet(0x90, pid + (b'\x00' if self.v5 else b'') + bytes(granted)))
+                elif kind == 10:  # UNSUBSCRIBE
+                    pid = body[:2]
+                    i = self._properties(body, 2)
+                    count = 0
+                    while i < len(body):
+                        topic, i = _mqtt_string(body, i)
+                        self.broker.unsubscribe(self, topic)
+                        count += 1
+                    self.send(_mqtt_packet(0xB0, pid + (b'\x00' * (count + 1) if self.v5 else b'')))
+                elif kind == 12:  # PINGREQ
+                    self.send(_mqtt_packet(0xD0, b''))
+                elif kind == 14:  # DISCONNECT
+                    break
+        except (ConnectionError, OSError, IndexError, struct.error):
+            pass
+
+    def finish(self):
+        self.broker._detach(self)
+        with self.queue_cond:
+            self.closed = True
+            self.queue_cond.notify()
+
+    def deliver(self, topic, payload):
+        delay, fate = self.broker.fault()
+        if fate == 'lost':
+            self.broker._count('dropped')
+            return
+        encoded = topic.encode()
+        body = struct.pack('!H', len(encoded)) + encoded + (b'\x00' if self.v5 else b'') + payload
+        self.send(_mqtt_packet(0x30, body), delay)
+        self.broker._count('delivered')
+
+
+class MockBroker:
+    def __init__(self, host='127.0.0.1', port=0, csm=None):
+        self.csm = csm  # bridge: publishes to mac//df are pushed into the CSM and routed
+        self.sessions = set()
+        self.exact = {}  # topic -> sessions subscribed to exactly that topic
+        self.patterns = {}  # wildcard pattern -> sessions
+        self.lock = threading.Lock()
+        self.stats = {'received': 0, 'delivered': 0, 'dropped': 0}
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), _MQTTSession)
+        self.server.daemon_threads = True
+        self.server.broker = self
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fault(self):
+        return self.csm.fault() if self.csm else (0.0, None)
+
+    def _count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _attach(self, session):
+        with self.lock:
+            self.sessions.add(session)
+
+    def _detach(self, session):
+        with self.lock:
+            self.sessions.discard(session)
+        for topic in list(session.subscriptions):
+            self.unsubscribe(session, topic)
+
+    def subscribe(self, session, topic):
+        # exact topics are a dict lookup per publish, only wildcards are matched one by one
+        index = self.patterns if '+' in topic or '#' in topic else self.exact
+        with self.lock:
+            session.subscriptions.add(topic)
+            index.setdefault(topic, set()).add(session)
+
+    def unsubscribe(self, session, topic):
+        index = self.patterns if '+' in topic or '#' in topic else self.exact
+        with self.lock:
+            session.subscriptions.discard(topic)
+            subscribers = index.get(topic)
+            if subscribers is not None:
+                subscribers.discard(session)
+                if not subscribers:
+                    del index[topic]
+
+    def publish(self, topic, payload):
+        with self.lock:
+            targets = set(self.exact.get(topic, ()))
+            for pattern, subscribers in self.patterns.items():
+                if topic_matches(pattern, topic):
+                    targets.update(subscribers)
+        for session in targets:
+            session.deliver(topic, payload)
+
+    def receive(self, topic, payload):
+        # A client published: fan out, then hand IoTtalk topics to the CSM for routing
+        self._count('received')
+        self.publish(topic, payload)
+        if self.csm and '//' in topic:
+            mac, df_name = topic.split('//', 1)
+            try:
+                data = json.loads(payload)['samples'][0][1]
+            except (ValueError, KeyError, IndexError, TypeError):
+                return
+            self.csm.push(mac, df_name, data, publish=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock IoTtalk CSM + MQTT broker')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9999)
+    parser.add_argument('--mqtt-port', type=int, default=None, help='also run the MQTT shim on this port')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='mean extra exponential delay (s)')
+    parser.add_argument('--loss', type=float, default=0.0, help='probability a response/message is dropped')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of HTTP 503')
+    parser.add_argument('--no-batch', action='store_true', help='no /batch endpoint, like the real CSM')
+    parser.add_argument('--link', action='append', default=[], metavar='SRC_MAC/DF=DST_MAC/DF',
+                        help="route pushes, e.g. '*/Gyroscope=*/Dummy_Control' (repeatable)")
+    parser.add_argument('--feed', action='append', default=[], metavar='DF=HZ',
+                        help="synthetic phone samples for every device with DF, e.g. 'Dummy_Control=50'")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    csm = MockCSM(args.host, args.port, latency=args.latency, jitter=args.jitter, loss=args.loss,
+                  error_rate=args.error_rate, batch=not args.no_batch, seed=args.seed)
+    for spec in args.link:
+        src, dst = spec.split('=')
+        csm.link(*src.split('/', 1), *dst.split('/', 1))
+    csm.start()
+    for spec in args.feed:
+        df_name, rate = spec.split('=')
+        csm.synthesize(df_name, float(rate))
+    print('mock CSM on {}'.format(csm.url), flush=True)
+    if args.mqtt_port is not None:
+        broker = csm.start_broker(args.host, args.mqtt_port)
+        print('mock MQTT broker on {}:{}'.format(*broker.address), flush=True)
+    try:
+        while True:
+            time.sleep(5)
+            print(csm.stats, csm.broker.stats if csm.broker else '')
+    except KeyboardInterrupt:
+        csm.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+MQTTPublisher: managed IDF publishing for DAI (and anything else pushing over MQTT)
+
+The caller's push() only stamps the sample and appends it to a bounded queue;
+a sender thread turns the queue into IoTtalk payloads on cached mac//IDF
+topics, and paho's network loop runs in the background so QoS handshakes and
+keepalives are serviced:
+
+    publisher = MQTTPublisher(client, device_id, coalesce=5, linger=0.02).start()
+    publisher.push('Gyroscope-I', [alpha, beta, gamma])      # never blocks
+    ...
+    publisher.stop()                                          # flushes first
+
+coalesce > 1 puts up to that many queued samples of one IDF into a single
+{'samples': [...]} payload, newest first like the CSM returns them (receivers
+that read samples[0] get the newest, the older ones only reach receivers that
+read the whole list). linger waits that long after the first
+queued sample so a burst can be coalesced; 0 only coalesces a backlog.
+While the broker is unreachable samples wait in the queue; when it is full the
+oldest sample is dropped and counted in stats['dropped'] (with a warning at most
+every warn_interval seconds) instead of being lost silently.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime as dt
+
+
+class MQTTPublisher:
+    def __init__(self, client, device_id, max_queue=1000, coalesce=1, linger=0.0, qos=0,
+                 start_loop=True, warn_interval=5.0):
+        self.client = client
+        self.device_id = device_id
+        self.queue = deque()  # (topic, time.time(), data), oldest first
+        self.max_queue = max_queue
+        self.coalesce = max(1, coalesce)
+        self.linger = linger
+        self.qos = qos
+        self.start_loop = start_loop  # False when the caller already runs loop_forever()
+        self.warn_interval = warn_interval
+        self.topics = {}  # IDF -> 'mac//IDF'
+        self.cond = threading.Condition()
+        self.running = False
+        self.sending = 0  # samples taken off the queue but not yet handed to paho
+        self.thread = None
+        self.warned = 0.0
+        self.stats = {'queued': 0, 'published': 0, 'messages': 0, 'dropped': 0,
+                      'failed': 0, 'max_depth': 0}
+
+    def start(self):
+        if self.start_loop:
+            self.client.loop_start()
+        self.running = True
+        self.thread = threading.Thread(target=self._send_loop, name='mqtt-publisher', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self.flush(timeout)
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout)
+        if self.start_loop:
+            self.client.loop_stop()
+
+    def topic(self, idf):
+        topic = self.topics.get(idf)
+        if topic is None:
+            topic = self.topics[idf] = '{}//{}'.format(self.device_id, idf)
+        return topic
+
+    def push(self, idf, data):
+        """Queue one sample for idf; returns False if the queue was full and the oldest sample was dropped."""
+        item = (self.topic(idf), time.time(), data)
+        with self.cond:
+            dropped = len(self.queue) >= self.max_queue
+            if dropped:
+                self.queue.popleft()
+                self.stats['dropped'] += 1
+            self.queue.append(item)
+            self.stats['queued'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], len(self.queue))
+            self.cond.notify()
+        if dropped:
+            self._warn()
+        return not dropped
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far was handed to paho; False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: not (self.queue or self.sending) or not self.running, timeout)
+
+    def _warn(self):
+        now = time.monotonic()
+        if now - self.warned >= self.warn_interval:
+            self.warned = now
+            print('[{}] MQTT publish queue full ({}): {} samples dropped so far'.format(
+                dt.now().strftime('%Y-%m-%d %H:%M:%S'), self.max_queue, self.stats['dropped']))
+
+    def _send_loop(self):
+        while True:
+            with self.cond:
+                # send only while connected, otherwise samples wait (bounded) for the reconnect
+                while self.running and not (self.queue and self.client.is_connected()):
+                    self.cond.wait(0.1)
+                if not self.running:
+                    return
+            if self.linger:
+                time.sleep(self.linger)
+            with self.cond:
+                batch = list(self.queue)
+                self.queue.clear()
+                self.sending = len(batch)
+            self._send(batch)
+            with self.cond:
+                self.sending = 0
+                self.cond.notify_all()  # wake flush()
+
+    def _send(self, batch):
+        by_topic = {}
+        for topic, t, data in batch:
+            by_topic.setdefault(topic, []).append([str(dt.fromtimestamp(t)), data])
+        for topic, samples in by_topic.items():
+            for i in range(0, len(samples), self.coalesce):
+                chunk = samples[i:i + self.coalesce]
+                chunk.reverse()  # newest first
+                info = self.client.publish(topic, json.dumps({'samples': chunk}), self.qos)
+                if info.rc == 0:
+                    self.stats['messages'] += 1
+                    self.stats['published'] += len(chunk)
+                else:
+                    self.stats['failed'] += len(chunk)
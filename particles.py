@@ -0,0 +1,181 @@
+"""
+Array-backed particle engine.
+
+Particles live in parallel arrays (position, velocity, life, color index)
+instead of one pygame Sprite per particle. Updates and culling run over the
+whole array at once and drawing is a single Surface.blits() call with
+pre-rendered, alpha-quantized stamps. NumPy is used when available,
+array.array otherwise.
+"""
+
+import random
+from array import array
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+PARTICLE_SIZE = 4
+ALPHA_LEVELS = 16
+
+
+class ParticleSystem:
+    def __init__(self, capacity=2000, seed=None, size=PARTICLE_SIZE, use_numpy=True):
+        self.capacity = capacity
+        self.size = size
+        self.count = 0
+        self.dropped = 0  # particles rejected because the cap was reached
+        self.high_water = 0  # most particles alive at once
+        self.palette = {}  # color -> index
+        self.stamps = []  # index -> [Surface per alpha level]
+        self.numpy = bool(use_numpy and np is not None)
+        if self.numpy:
+            self.rng = np.random.default_rng(seed)
+            self.x = np.zeros(capacity, np.float32)
+            self.y = np.zeros(capacity, np.float32)
+            self.vx = np.zeros(capacity, np.float32)
+            self.vy = np.zeros(capacity, np.float32)
+            self.life = np.zeros(capacity, np.float32)
+            self.max_life = np.ones(capacity, np.float32)
+            self.color = np.zeros(capacity, np.int16)
+        else:
+            self.rng = random.Random(seed)
+            self.x = array('f', bytes(4 * capacity))
+            self.y = array('f', bytes(4 * capacity))
+            self.vx = array('f', bytes(4 * capacity))
+            self.vy = array('f', bytes(4 * capacity))
+            self.life = array('f', bytes(4 * capacity))
+            self.max_life = array('f', [1.0]) * capacity
+            self.color = array('h', bytes(2 * capacity))
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def stats(self):
+        return {
+            'capacity': self.capacity,
+            'in_use': self.count,
+            'high_water': self.high_water,
+            'dropped': self.dropped,
+        }
+
+    def color_index(self, color):
+        index = self.palette.get(color)
+        if index is None:
+            index = len(self.stamps)
+            self.palette[color] = index
+            stamps = []
+            for level in range(ALPHA_LEVELS + 1):
+                surf = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+                surf.fill((color[0], color[1], color[2], level * 255 // ALPHA_LEVELS))
+                stamps.append(surf)
+            self.stamps.append(stamps)
+        return index
+
+    def emit(self, x, y, color, vx, vy, life):
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return False
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = vx
+        self.vy[i] = vy
+        self.life[i] = life
+        self.max_life[i] = life
+        self.color[i] = self.color_index(color)
+        self.count = i + 1
+        if self.count > self.high_water:
+            self.high_water = self.count
+        return True
+
+    def burst(self, x, y, color, count, speed, life):
+        """Emit count particles at (x, y) with velocities uniform in [-speed, speed]."""
+        start = self.count
+        n = min(count, self.capacity - start)
+        self.dropped += count - n
+        if n <= 0:
+            return 0
+        end = start + n
+        index = self.color_index(color)
+        if self.numpy:
+            self.x[start:end] = x
+            self.y[start:end] = y
+            self.vx[start:end] = self.rng.uniform(-speed, speed, n)
+            self.vy[start:end] = self.rng.uniform(-speed, speed, n)
+            self.life[start:end] = life
+            self.max_life[start:end] = life
+            self.color[start:end] = index
+        else:
+            uniform = self.rng.uniform
+            for i in range(start, end):
+                self.x[i] = x
+                self.y[i] = y
+                self.vx[i] = uniform(-speed, speed)
+                self.vy[i] = uniform(-speed, speed)
+                self.life[i] = life
+                self.max_life[i] = life
+                self.color[i] = index
+        self.count = end
+        if end > self.high_water:
+            self.high_water = end
+        return n
+
+    def update(self, steps=1.0):
+        """Advance every particle by `steps` frames and cull dead ones in bulk."""
+        n = self.count
+        if n == 0:
+            return
+        if self.numpy:
+            self.x[:n] += self.vx[:n] * steps
+            self.y[:n] += self.vy[:n] * steps
+            self.life[:n] -= steps
+            keep = self.life[:n] > 0
+            alive = int(np.count_nonzero(keep))
+            if alive != n:
+                for arr in (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.color):
+                    arr[:alive] = arr[:n][keep]
+            self.count = alive
+        else:
+            x, y, vx, vy, life, max_life, color = (
+                self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.color)
+            alive = 0
+            for i in range(n):
+                remaining = life[i] - steps
+                if remaining <= 0:
+                    continue
+                x[alive] = x[i] + vx[i] * steps
+                y[alive] = y[i] + vy[i] * steps
+                vx[alive] = vx[i]
+                vy[alive] = vy[i]
+                life[alive] = remaining
+                max_life[alive] = max_life[i]
+                color[alive] = color[i]
+                alive += 1
+            self.count = alive
+
+    def draw(self, surface, doreturn=False):
+        """Blit every live particle; with doreturn, return the touched rects."""
+        n = self.count
+        if n == 0:
+            return [] if doreturn else None
+        half = self.size // 2
+        stamps = self.stamps
+        if self.numpy:
+            levels = (self.life[:n] * ALPHA_LEVELS / self.max_life[:n]).astype(np.int16)
+            xs = (self.x[:n] - half).astype(np.int32).tolist()
+            ys = (self.y[:n] - half).astype(np.int32).tolist()
+            colors = self.color[:n].tolist()
+            levels = levels.tolist()
+        else:
+            xs = [int(v) - half for v in self.x[:n]]
+            ys = [int(v) - half for v in self.y[:n]]
+            colors = self.color[:n]
+            levels = [int(l * ALPHA_LEVELS / m) for l, m in zip(self.life[:n], self.max_life[:n])]
+        return surface.blits([(stamps[c][l], (px, py)) for c, l, px, py in zip(colors, levels, xs, ys)], doreturn)
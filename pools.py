@@ -0,0 +1,66 @@
+"""
+Free-list object pools for short-lived game entities.
+
+Pooled objects must implement reset(*args), which re-initialises an instance
+exactly like its constructor would. The pool stamps each object it creates
+with `.pool` so the object can hand itself back (e.g. from Sprite.kill).
+"""
+
+
+class ObjectPool:
+    def __init__(self, factory, max_free=None):
+        self.factory = factory
+        self.max_free = max_free  # None = keep every released object
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+        self.discarded = 0  # released while the free list was full
+        self.in_use = 0
+        self.high_water = 0  # most objects in use at once
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reused += 1
+        else:
+            obj = self.factory(*args)
+            obj.pool = self
+            self.created += 1
+        obj.in_pool = False
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        if getattr(obj, 'in_pool', False):
+            return  # already released (e.g. kill() called twice)
+        obj.in_pool = True
+        self.in_use -= 1
+        self.released += 1
+        if self.max_free is not None and len(self.free) >= self.max_free:
+            self.discarded += 1
+            return
+        self.free.append(obj)
+
+    def prefill(self, n, *args):
+        """Create n objects up front so the first waves do not allocate."""
+        high_water, reused = self.high_water, self.reused
+        objs = [self.acquire(*args) for _ in range(n)]
+        for obj in objs:
+            self.release(obj)
+        self.high_water, self.reused = high_water, reused
+        self.released -= n
+
+    def stats(self):
+        return {
+            'created': self.created,
+            'reused': self.reused,
+            'released': self.released,
+            'discarded': self.discarded,
+            'in_use': self.in_use,
+            'free': len(self.free),
+            'high_water': self.high_water,
+        }
@@ -0,0 +1,169 @@
+"""
+Frame-time profiler with per-stage timing, a ring buffer and an overlay.
+
+Usage in a loop:
+
+    prof.begin_frame()
+    ...handle events...
+    prof.lap('events')
+    ...update...
+    prof.lap('update')
+    prof.end_frame()
+
+lap() charges the time since the previous lap (or begin_frame) to a stage,
+so one call per stage boundary is enough. The last `capacity` frames are
+kept in fixed-size ring buffers; dump() writes them to CSV or JSON.
+"""
+
+import csv
+import json
+import time
+
+import pygame
+
+OVERLAY_REFRESH = 15  # frames between overlay text re-renders
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600, clock=time.perf_counter):
+        self.capacity = capacity
+        self.clock = clock
+        self.frames = [0.0] * capacity  # frame time in ms
+        self.stages = {}  # stage -> [ms] * capacity, in first-seen order
+        self.current = {}
+        self.index = 0  # next ring slot
+        self.count = 0  # frames recorded (saturates at capacity)
+        self.total = 0  # frames recorded since start
+        self.frame_start = None
+        self.last = None
+        self.overlay = False
+        self._overlay_surf = None
+        self._overlay_age = OVERLAY_REFRESH
+
+    def begin_frame(self):
+        self.frame_start = self.last = self.clock()
+        self.current.clear()
+
+    def lap(self, stage):
+        now = self.clock()
+        self.current[stage] = self.current.get(stage, 0.0) + (now - self.last) * 1000.0
+        self.last = now
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        i = self.index
+        self.frames[i] = (self.clock() - self.frame_start) * 1000.0
+        for stage, ms in self.current.items():
+            ring = self.stages.get(stage)
+            if ring is None:
+                ring = self.stages[stage] = [0.0] * self.capacity
+            ring[i] = ms
+        for stage, ring in self.stages.items():
+            if stage not in self.current:
+                ring[i] = 0.0
+        self.index = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.total += 1
+        self.frame_start = None
+
+    def _ordered(self, ring):
+        # Ring contents oldest -> newest
+        if self.count < self.capacity:
+            return ring[:self.count]
+        return ring[self.index:] + ring[:self.index]
+
+    def summary(self):
+        frames = sorted(self._ordered(self.frames))
+        result = {
+            'frames': self.count,
+            'p50': percentile(frames, 50),
+            'p95': percentile(frames, 95),
+            'p99': percentile(frames, 99),
+            'max': frames[-1] if frames else 0.0,
+            'stages': {},
+        }
+        n = max(self.count, 1)
+        for stage, ring in self.stages.items():
+            result['stages'][stage] = sum(self._ordered(ring)) / n
+        return result
+
+    def rows(self):
+        stages = list(self.stages)
+        columns = [self._ordered(self.frames)] + [self._ordered(self.stages[s]) for s in stages]
+        first = self.total - self.count
+        for offset, values in enumerate(zip(*columns)):
+            yield [first + offset] + list(values)
+
+    def dump(self, path):
+        """Write the buffered per-frame timings (ms) to path (.json or .csv)."""
+        header = ['frame', 'frame_ms'] + [f'{s}_ms' for s in self.stages]
+        if path.endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(),
+                           'frames': [dict(zip(header, row)) for row in self.rows()]}, f, indent=1)
+        else:
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(self.rows())
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self._overlay_age = OVERLAY_REFRESH
+
+    def draw_overlay(self, screen, font, pos=(8, 8)):
+        """Draw the p50/p95/p99 overlay if enabled; returns the drawn rect or None."""
+        if not self.overlay:
+            return None
+        self._overlay_age += 1
+        if self._overlay_surf is None or self._overlay_age >= OVERLAY_REFRESH:
+            self._overlay_age = 0
+            self._overlay_surf = self._render_overlay(font)
+        return screen.blit(self._overlay_surf, pos)
+
+    def _render_overlay(self, font):
+        s = self.summary()
+        fps = 1000.0 / s['p50'] if s['p50'] else 0.0
+        lines = [f"frame p50 {s['p50']:.2f}  p95 {s['p95']:.2f}  p99 {s['p99']:.2f} ms  ({fps:.0f} fps)"]
+        lines += [f"{stage:<10} {ms:6.2f} ms" for stage, ms in s['stages'].items()]
+        rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+        line_h = font.get_linesize()
+        w = max(r.get_width() for r in rendered) + 8
+        surf = pygame.Surface((w, line_h * len(rendered) + 8), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 170))
+        for i, r in enumerate(rendered):
+            surf.blit(r, (4, 4 + i * line_h))
+        return surf
+
+
+class NullProfiler:
+    # Same interface, does nothing; used when no profiler is attached
+    overlay = False
+
+    def begin_frame(self):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def toggle_overlay(self):
+        pass
+
+    def draw_overlay(self, screen, font, pos=(8, 8)):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
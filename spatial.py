@@ -0,0 +1,124 @@
+"""
+Uniform-grid spatial hash for sprite collision broadphase.
+
+Each sprite is linked into every grid cell its rect overlaps. The index is
+kept in sync incrementally: a sprite is only relinked when the span of cells
+it covers changes, and sprites that left the group are unlinked. The collide
+helpers mirror pygame.sprite.groupcollide / spritecollide, including their
+return shapes and dokill semantics, but only test rects that share a cell.
+"""
+
+DEFAULT_CELL_SIZE = 64
+
+
+class SpatialHash:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}  # (cx, cy) -> {sprite: None}, dict keeps insertion order
+        self.spans = {}  # sprite -> (x0, y0, x1, y1) cell span
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __contains__(self, sprite):
+        return sprite in self.spans
+
+    def _span(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, rect.top // cs,
+                (rect.right - 1) // cs, (rect.bottom - 1) // cs)
+
+    def _link(self, sprite, span):
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cells[(cx, cy)] = {sprite: None}
+                else:
+                    cell[sprite] = None
+
+    def _unlink(self, sprite, span):
+        cells = self.cells
+        x0, y0, x1, y1 = span
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells[(cx, cy)]
+                del cell[sprite]
+                if not cell:
+                    del cells[(cx, cy)]
+
+    def update(self, sprite):
+        """Insert sprite or relink it if its rect moved into different cells."""
+        span = self._span(sprite.rect)
+        old = self.spans.get(sprite)
+        if old == span:
+            return
+        if old is not None:
+            self._unlink(sprite, old)
+        self._link(sprite, span)
+        self.spans[sprite] = span
+
+    def remove(self, sprite):
+        span = self.spans.pop(sprite, None)
+        if span is not None:
+            self._unlink(sprite, span)
+
+    def clear(self):
+        self.cells.clear()
+        self.spans.clear()
+
+    def sync(self, group):
+        """Bring the index in line with the sprites currently in group."""
+        for sprite in [s for s in self.spans if s not in group]:
+            self.remove(sprite)
+        update = self.update
+        for sprite in group:
+            update(sprite)
+
+    def query(self, rect):
+        """Return the indexed sprites whose rect collides with rect."""
+        cells = self.cells
+        x0, y0, x1, y1 = self._span(rect)
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        colliderect = rect.colliderect
+        return [s for s in found if colliderect(s.rect)]
+
+
+def spritecollide(sprite, group, dokill, index=None):
+    """Same as pygame.sprite.spritecollide, using index as the broadphase."""
+    if index is None:
+        index = SpatialHash()
+    index.sync(group)
+    hits = index.query(sprite.rect)
+    if dokill:
+        for s in hits:
+            index.remove(s)
+            s.kill()
+    return hits
+
+
+def groupcollide(groupa, groupb, dokilla, dokillb, index=None):
+    """Same as pygame.sprite.groupcollide; index is the spatial hash of groupb."""
+    if index is None:
+        index = SpatialHash()
+    index.sync(groupb)
+    crashed = {}
+    for a in groupa.sprites():
+        hits = index.query(a.rect)
+        if not hits:
+            continue
+        if dokillb:
+            for b in hits:
+                index.remove(b)
+                b.kill()
+        crashed[a] = hits
+        if dokilla:
+            a.kill()
+    return crashed
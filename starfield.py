@@ -0,0 +1,105 @@
+"""
+Vectorized parallax starfield.
+
+Star coordinates and speeds live in arrays and are advanced in one step per
+update; drawing is a single Surface.blits() call with pre-rendered star
+stamps (one per color and radius). NumPy is used when available, plain
+lists otherwise.
+"""
+
+import random
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+DEFAULT_COLORS = ((255, 255, 255), (0, 255, 255), (100, 100, 255))
+MIN_SPEED, MAX_SPEED = 0.5, 3.0
+
+
+class Starfield:
+    def __init__(self, count, width, height, colors=DEFAULT_COLORS, seed=None, use_numpy=True):
+        self.count = count
+        self.width = width
+        self.height = height
+        if seed is None:
+            seed = random.getrandbits(32)  # follows random.seed()
+        self.numpy = bool(use_numpy and np is not None)
+
+        # Stamp per (color, radius); radius = int(speed) so faster stars look bigger
+        self.radii = list(range(int(MAX_SPEED) + 1))
+        self.stamps = [self._stamp(color, r) for color in colors for r in self.radii]
+        n_radii = len(self.radii)
+
+        if self.numpy:
+            self.rng = np.random.default_rng(seed)
+            rng = self.rng
+            self.x = rng.integers(0, width + 1, count).astype(np.float32)
+            self.y = rng.integers(0, height + 1, count).astype(np.float32)
+            self.prev_y = self.y.copy()
+            self.speed = rng.uniform(MIN_SPEED, MAX_SPEED, count).astype(np.float32)
+            radius = self.speed.astype(np.int32)
+            self.style = rng.integers(0, len(colors), count) * n_radii + radius
+            self.offset = radius  # stamp is centered on (x, y)
+            self.visible = radius > 0
+        else:
+            self.rng = random.Random(seed)
+            rng = self.rng
+            self.x = [float(rng.randint(0, width)) for _ in range(count)]
+            self.y = [float(rng.randint(0, height)) for _ in range(count)]
+            self.prev_y = list(self.y)
+            self.speed = [rng.uniform(MIN_SPEED, MAX_SPEED) for _ in range(count)]
+            self.style = [rng.randrange(len(colors)) * n_radii + int(s) for s in self.speed]
+            self.offset = [int(s) for s in self.speed]
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def _stamp(color, radius):
+        surf = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+        if radius > 0:
+            pygame.draw.circle(surf, color, (radius, radius), radius)
+        return surf
+
+    def update(self, steps=1.0):
+        """Scroll every star down by speed * steps; stars leaving the bottom wrap to the top."""
+        if self.numpy:
+            self.prev_y[:] = self.y
+            self.y += self.speed * steps
+            wrapped = self.y > self.height
+            k = int(np.count_nonzero(wrapped))
+            if k:
+                self.y[wrapped] = 0
+                self.prev_y[wrapped] = 0  # no interpolation across the wrap
+                self.x[wrapped] = self.rng.integers(0, self.width + 1, k)
+        else:
+            x, y, prev_y, speed = self.x, self.y, self.prev_y, self.speed
+            for i in range(self.count):
+                prev_y[i] = y[i]
+                y[i] += speed[i] * steps
+                if y[i] > self.height:
+                    y[i] = prev_y[i] = 0.0
+                    x[i] = float(self.rng.randint(0, self.width))
+
+    def draw(self, surface, alpha=1.0, doreturn=False):
+        """Blit every star interpolated between the last two updates."""
+        stamps = self.stamps
+        if self.numpy:
+            vis = self.visible
+            offset = self.offset[vis]
+            ys = self.prev_y[vis] + (self.y[vis] - self.prev_y[vis]) * alpha
+            xs = (self.x[vis].astype(np.int32) - offset).tolist()
+            ys = (ys.astype(np.int32) - offset).tolist()
+            styles = self.style[vis].tolist()
+        else:
+            xs, ys, styles = [], [], []
+            for x, y, py, style, r in zip(self.x, self.y, self.prev_y, self.style, self.offset):
+                if r:
+                    xs.append(int(x) - r)
+                    ys.append(int(py + (y - py) * alpha) - r)
+                    styles.append(style)
+        return surface.blits([(stamps[s], (x, y)) for s, x, y in zip(styles, xs, ys)], doreturn)
@@ -0,0 +1,141 @@
+"""
+Constant-memory streaming statistics.
+
+RunningStats  count / mean / variance (Welford) / min / max
+P2Quantile    one quantile estimated with the P² algorithm (Jain & Chlamtac),
+              five markers regardless of how many samples are seen
+Histogram     fixed bins over [lo, hi) with under/overflow counts; quantiles
+              accurate to a fraction of a bin even for multi-modal data
+"""
+
+import math
+
+
+class RunningStats:
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        # Sample variance, same as statistics.variance
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def range(self):
+        return self.max - self.min if self.n else 0.0
+
+
+class P2Quantile:
+    def __init__(self, p):
+        self.p = p
+        self.n = 0
+        self.q = []  # marker heights
+        self.pos = [1, 2, 3, 4, 5]  # marker positions
+        self.want = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]  # desired positions
+        self.step = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.n += 1
+        q = self.q
+        if self.n <= 5:
+            q.append(x)
+            if self.n == 5:
+                q.sort()
+            return
+
+        # Find the cell k containing x and adjust the extreme markers
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        pos, want = self.pos, self.want
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        for i in range(5):
+            want[i] += self.step[i]
+
+        # Nudge the three middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = want[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = candidate
+                pos[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.q, self.pos
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    @property
+    def value(self):
+        if self.n == 0:
+            return math.nan
+        if self.n <= 5:
+            # Exact on the few samples seen so far
+            s = sorted(self.q)
+            return s[min(len(s) - 1, int(round(self.p * (len(s) - 1))))]
+        return self.q[2]
+
+
+class Histogram:
+    def __init__(self, lo, hi, bins):
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.width = (hi - lo) / bins
+        self.counts = [0] * bins
+        self.under = 0
+        self.over = 0
+        self.n = 0
+
+    def add(self, x):
+        self.n += 1
+        if x < self.lo:
+            self.under += 1
+        elif x >= self.hi:
+            self.over += 1
+        else:
+            self.counts[min(self.bins - 1, int((x - self.lo) / self.width))] += 1
+
+    def quantile(self, p):
+        """Quantile interpolated inside its bin; None if it lands outside [lo, hi)."""
+        if self.n == 0:
+            return None
+        target = p * self.n
+        seen = self.under
+        if target <= seen:
+            return None
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= target:
+                return self.lo + (i + (target - seen) / c) * self.width
+            seen += c
+        return None
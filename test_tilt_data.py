@@ -7,6 +7,7 @@ import DAN
 import time
 import statistics
 from collections import deque
+from tilt_analysis import PHASES, TiltAnalysis
 
 # --- IoTtalk 設定 ---
 ServerURL = 'https://class.iottalk.tw'
@@ -53,39 +54,13 @@ except Exception as e:
     print(f"❌ 連線失敗: {e}")
     exit(1)
 
-# 數據記錄
-all_data = []
-current_session = []
-session_start_time = None
-session_name = ""
+# 數據記錄：只保留串流統計量（見 tilt_analysis.py），長時間測試也不會累積記憶體
+analysis = TiltAnalysis()
 
 # 用於計算移動平均的窗口
 data_window = deque(maxlen=10)
 
-def print_statistics(data_list, label):
-    """計算並顯示統計信息"""
-    if not data_list:
-        return
-    
-    values = [float(d['value']) for d in data_list]
-    print(f"\n{label} 統計：")
-    print(f"  數據點數: {len(values)}")
-    print(f"  最小值: {min(values):.4f}")
-    print(f"  最大值: {max(values):.4f}")
-    print(f"  平均值: {statistics.mean(values):.4f}")
-    print(f"  中位數: {statistics.median(values):.4f}")
-    if len(values) > 1:
-        print(f"  標準差: {statistics.stdev(values):.4f}")
-    print(f"  範圍: {max(values) - min(values):.4f}")
-
-# 測試階段 - 改為手動控制模式（延長測試時間）
-phases = [
-    ("保持水平（基準）", 5),      # 從 3 秒增加到 5 秒
-    ("向右傾斜到極限", 8),        # 從 5 秒增加到 8 秒
-    ("回到水平", 3),              # 從 2 秒增加到 3 秒
-    ("向左傾斜到極限", 8),        # 從 5 秒增加到 8 秒
-    ("回到水平", 3),              # 從 2 秒增加到 3 秒
-]
+phases = PHASES
 
 phase_index = 0
 phase_start_time = time.time()
@@ -111,8 +86,8 @@ try:
                 first_data_received = True
             
             # 調試：顯示接收到的數據（前5次非None數據）
-            if data is not None and len(all_data) < 5:
-                print(f"\n[調試 #{len(all_data)+1}] 收到數據: {data}, 類型: {type(data)}")
+            if data is not None and analysis.count < 5:
+                print(f"\n[調試 #{analysis.count+1}] 收到數據: {data}, 類型: {type(data)}")
                 if isinstance(data, (list, tuple)):
                     print(f"  [調試] 列表長度: {len(data)}")
                     for i, item in enumerate(data):
@@ -136,7 +111,7 @@ try:
                 gamma_value = None
                 
                 # 調試：顯示原始數據格式（前幾次）
-                if len(all_data) < 3:
+                if analysis.count < 3:
                     print(f"\n[調試] 原始數據: {data}, 類型: {type(data)}")
                     if isinstance(data, (list, tuple)):
                         print(f"[調試] 列表長度: {len(data)}")
@@ -202,20 +177,20 @@ try:
                                 '倒立': 0.0       # 倒立 = 倒置
                             }
                             raw_value = direction_map.get(val, 0.0)
-                            if len(all_data) < 5:
+                            if analysis.count < 5:
                                 print(f"  [調試] 方向字符串轉換: '{val}' -> {raw_value}")
                         else:
                             try:
                                 raw_value = float(val)
-                                if len(all_data) < 5:
+                                if analysis.count < 5:
                                     print(f"  [調試] 單一值轉換: {val} -> {raw_value}")
                             except (ValueError, TypeError) as e:
-                                if len(all_data) < 5:
+                                if analysis.count < 5:
                                     print(f"  [調試] 轉換失敗: {val}, 錯誤: {e}")
                                 raw_value = 0.0
                     else:
                         # 數據長度不是 1 或 3，可能是其他格式
-                        if len(all_data) < 3:
+                        if analysis.count < 3:
                             print(f"\n[調試] 數據長度異常: {len(data)}, 數據內容: {data}")
                         continue
                 else:
@@ -224,7 +199,7 @@ try:
                             data = data[0] if len(data) > 0 else 0
                         raw_value = float(data)
                     except (ValueError, TypeError) as e:
-                        if len(all_data) < 3:
+                        if analysis.count < 3:
                             print(f"\n⚠️ 無法轉換數據: {data}, 錯誤: {e}")
                         continue
                 
@@ -239,18 +214,8 @@ try:
                         if isinstance(data[0], str):
                             direction_str = data[0]
                     
-                    data_point = {
-                        'time': current_time,
-                        'value': raw_value,
-                        'phase': phases[phase_index][0],
-                        'raw_data': data if isinstance(data, (list, tuple)) else [data],
-                        'alpha': alpha_value,
-                        'beta': beta_value,
-                        'gamma': gamma_value,
-                        'direction': direction_str
-                    }
-                    all_data.append(data_point)
-                    current_session.append(data_point)
+                    analysis.add(phases[phase_index][0], raw_value, alpha_value, beta_value, gamma_value,
+                                 direction_str, data if isinstance(data, (list, tuple)) else [data])
                     data_window.append(raw_value)
                     
                     # 計算移動平均（平滑顯示）
@@ -285,8 +250,7 @@ try:
                 # 檢查是否該進入下一階段
                 if elapsed >= phases[phase_index][1]:
                     # 顯示階段統計
-                    print_statistics(current_session, phases[phase_index][0])
-                    current_session = []
+                    analysis.end_session(phases[phase_index][0])
                     
                     phase_index += 1
                     if phase_index >= len(phases):
@@ -317,180 +281,7 @@ print("\n" + "=" * 60)
 print("📊 整體統計報告")
 print("=" * 60)
 
-if all_data:
-    # 按階段分組
-    phases_data = {}
-    for point in all_data:
-        phase = point['phase']
-        if phase not in phases_data:
-            phases_data[phase] = []
-        phases_data[phase].append(point)
-    
-    # 顯示每個階段的統計
-    for phase_name in phases_data.keys():
-        print_statistics(phases_data[phase_name], phase_name)
-    
-    # 整體統計
-    all_values = [float(d['value']) for d in all_data]
-    print(f"\n整體統計（所有數據）：")
-    print(f"  總數據點數: {len(all_values)}")
-    print(f"  最小值: {min(all_values):.4f}")
-    print(f"  最大值: {max(all_values):.4f}")
-    print(f"  平均值: {statistics.mean(all_values):.4f}")
-    print(f"  中位數: {statistics.median(all_values):.4f}")
-    if len(all_values) > 1:
-        print(f"  標準差: {statistics.stdev(all_values):.4f}")
-    print(f"  範圍: {max(all_values) - min(all_values):.4f}")
-    
-    # 判斷數據類型
-    print(f"\n📋 數據類型判斷：")
-    # 檢查第一個數據點的原始格式
-    if all_data and 'raw_data' in all_data[0]:
-        raw_format = all_data[0]['raw_data']
-        # 檢查是否為方向字符串
-        if all_data[0].get('direction') is not None:
-            print("  ⚠️ 這是 Gyroscope（陀螺儀）方向字符串數據")
-            print("  💡 問題：IoTtalk 返回的是方向描述，而不是數值")
-            print("  🔧 解決方案：")
-            print("     1. 檢查 IoTtalk Canvas 上的連接")
-            print("     2. 確保連接的是 Smartphone (Gyroscope) 的數值輸出（x1, x2, x3）")
-            print("     3. 而不是方向描述輸出")
-            # 統計各方向出現的頻率
-            directions = [d.get('direction') for d in all_data if d.get('direction') is not None]
-            if directions:
-                from collections import Counter
-                direction_counts = Counter(directions)
-                print("  📊 方向統計（所有階段）：")
-                for direction, count in direction_counts.items():
-                    print(f"    {direction}: {count} 次")
-        elif isinstance(raw_format, (list, tuple)) and len(raw_format) >= 3:
-            print("  ✅ 這是 Gyroscope（陀螺儀）數據（[alpha, beta, gamma] 角速度）")
-            print("  💡 建議：使用 Gyroscope 模式，使用 Gamma（繞 Y 軸，roll）控制左右")
-            print(f"  📊 Gamma 範圍: {min(all_values):.3f} 到 {max(all_values):.3f}")
-            if all_data[0].get('alpha') is not None:
-                alpha_values = [d.get('alpha', 0) for d in all_data if d.get('alpha') is not None]
-                beta_values = [d.get('beta', 0) for d in all_data if d.get('beta') is not None]
-                gamma_values = [d.get('gamma', 0) for d in all_data if d.get('gamma') is not None]
-                if alpha_values:
-                    print(f"  📊 Alpha 範圍: {min(alpha_values):.3f} 到 {max(alpha_values):.3f}")
-                if beta_values:
-                    print(f"  📊 Beta 範圍: {min(beta_values):.3f} 到 {max(beta_values):.3f}")
-                if gamma_values:
-                    print(f"  📊 Gamma 範圍: {min(gamma_values):.3f} 到 {max(gamma_values):.3f}")
-        elif isinstance(raw_format, (list, tuple)):
-            print("  ✅ 這是列表格式數據")
-            print(f"  📊 數據長度: {len(raw_format)}")
-            if len(raw_format) > 0:
-                print(f"  📊 第一個元素: {raw_format[0]}, 類型: {type(raw_format[0])}")
-        else:
-            print("  ✅ 這是單一數值數據")
-    elif 0 <= min(all_values) <= 360 and 0 <= max(all_values) <= 360:
-        print("  ✅ 這是指南針數據（角度 0-360）")
-        print("  💡 建議：使用指南針模式")
-    else:
-        print("  ✅ 這是加速度計或其他單一數值數據")
-        print("  💡 建議：使用加速度計模式")
-    
-    # 分析左右傾斜的數據範圍（特別針對 Gamma 值）
-    right_phase_name = "向右傾斜到極限"
-    left_phase_name = "向左傾斜到極限"
-    center_phase_name = "保持水平（基準）"
-    
-    if right_phase_name in phases_data and left_phase_name in phases_data:
-        right_values = [float(d['value']) for d in phases_data[right_phase_name]]
-        left_values = [float(d['value']) for d in phases_data[left_phase_name]]
-        center_values = []
-        if center_phase_name in phases_data:
-            center_values = [float(d['value']) for d in phases_data[center_phase_name]]
-        
-        print(f"\n" + "=" * 60)
-        print(f"🎯 關鍵數值分析（用於 Game.py 設定）")
-        print(f"=" * 60)
-        
-        # 計算極值
-        right_max = max(right_values) if right_values else 0
-        right_min = min(right_values) if right_values else 0
-        right_avg = statistics.mean(right_values) if right_values else 0
-        
-        left_max = max(left_values) if left_values else 0
-        left_min = min(left_values) if left_values else 0
-        left_avg = statistics.mean(left_values) if left_values else 0
-        
-        center_avg = statistics.mean(center_values) if center_values else 0
-        center_min = min(center_values) if center_values else 0
-        center_max = max(center_values) if center_values else 0
-        
-        print(f"\n📊 Gamma 值統計：")
-        print(f"  🎯 中間點（基準值）: {center_avg:.4f}")
-        print(f"     範圍: {center_min:.4f} 到 {center_max:.4f}")
-        print(f"\n  ➡️  極右（向右傾斜到極限）:")
-        print(f"     最大值: {right_max:.4f}")
-        print(f"     最小值: {right_min:.4f}")
-        print(f"     平均值: {right_avg:.4f}")
-        print(f"\n  ⬅️  極左（向左傾斜到極限）:")
-        print(f"     最大值: {left_max:.4f}")
-        print(f"     最小值: {left_min:.4f}")
-        print(f"     平均值: {left_avg:.4f}")
-        
-        # 計算建議的參數
-        print(f"\n💡 Game.py 建議設定：")
-        print(f"  baseline = {center_avg:.4f}  # 中間點（基準值）")
-        
-        # 計算偏移範圍
-        right_offset_max = right_max - center_avg
-        right_offset_min = right_min - center_avg
-        left_offset_max = left_max - center_avg
-        left_offset_min = left_min - center_avg
-        
-        max_offset = max(abs(right_offset_max), abs(right_offset_min), 
-                        abs(left_offset_max), abs(left_offset_min))
-        
-        if max_offset > 0:
-            # 計算縮放因子，讓最大偏移映射到 10
-            suggested_scale = 10.0 / max_offset
-            print(f"  scale_factor = {suggested_scale:.4f}  # 縮放因子（約 {suggested_scale:.2f}）")
-            print(f"  dead_zone = {max_offset * 0.1:.2f}  # 死區（建議為最大偏移的 10%）")
-        
-        print(f"\n  📝 控制邏輯：")
-        print(f"     offset = gamma_value - {center_avg:.4f}")
-        if right_avg > center_avg:
-            print(f"     offset > 0 → 向右移動")
-            print(f"     offset < 0 → 向左移動")
-        else:
-            print(f"     offset > 0 → 向左移動")
-            print(f"     offset < 0 → 向右移動（可能需要反轉）")
-        
-        # 如果使用方向字符串，顯示各階段的方向統計
-        if all_data and all_data[0].get('direction') is not None:
-            right_directions = [d.get('direction') for d in phases_data[right_phase_name] if d.get('direction')]
-            left_directions = [d.get('direction') for d in phases_data[left_phase_name] if d.get('direction')]
-            if right_directions:
-                from collections import Counter
-                right_counts = Counter(right_directions)
-                print(f"\n  📊 向右傾斜時的方向分布：")
-                for direction, count in right_counts.items():
-                    print(f"    {direction}: {count} 次")
-            if left_directions:
-                from collections import Counter
-                left_counts = Counter(left_directions)
-                print(f"\n  📊 向左傾斜時的方向分布：")
-                for direction, count in left_counts.items():
-                    print(f"    {direction}: {count} 次")
-    elif "向右傾斜" in phases_data and "向左傾斜" in phases_data:
-        # 舊版本兼容
-        right_values = [float(d['value']) for d in phases_data["向右傾斜"]]
-        left_values = [float(d['value']) for d in phases_data["向左傾斜"]]
-        
-        print(f"\n📐 傾斜方向分析：")
-        print(f"  向右傾斜平均值: {statistics.mean(right_values):.4f}")
-        print(f"  向左傾斜平均值: {statistics.mean(left_values):.4f}")
-        
-        if statistics.mean(right_values) > statistics.mean(left_values):
-            print(f"  ✅ 向右傾斜的值 > 向左傾斜的值")
-            print(f"  💡 如果方向相反，需要反轉邏輯")
-        else:
-            print(f"  ✅ 向右傾斜的值 < 向左傾斜的值")
-            print(f"  💡 如果方向相反，需要反轉邏輯")
+analysis.print_report()
 
 print("\n" + "=" * 60)
 print("測試完成！請將上述統計信息提供給開發者以調整設定。")
@@ -0,0 +1,295 @@
+"""
+串流統計分析：test_tilt_data.py 的報告引擎
+
+每筆樣本只更新固定大小的統計量（Welford 平均/標準差、固定分箱直方圖的
+中位數、方向字串計數），不保留原始數據，記憶體用量與測試時間長短無關。
+同一套分析也能直接讀取 tilt_record 錄製的檔案：
+
+    python tilt_analysis.py session.tilt            # 依 PHASES 的時間表切分階段
+    python tilt_analysis.py session.tilt --no-phases  # 長時間錄製，全部視為同一階段
+"""
+
+import argparse
+import math
+from collections import Counter
+
+from streaming_stats import Histogram, RunningStats
+
+# 測試階段 - 手動控制模式（延長測試時間）
+PHASES = [
+    ("保持水平（基準）", 5),      # 從 3 秒增加到 5 秒
+    ("向右傾斜到極限", 8),        # 從 5 秒增加到 8 秒
+    ("回到水平", 3),              # 從 2 秒增加到 3 秒
+    ("向左傾斜到極限", 8),        # 從 5 秒增加到 8 秒
+    ("回到水平", 3),              # 從 2 秒增加到 3 秒
+]
+CENTER_PHASE = "保持水平（基準）"
+RIGHT_PHASE = "向右傾斜到極限"
+LEFT_PHASE = "向左傾斜到極限"
+ALL_PHASE = "全部數據"
+
+# 0.1 度一格，涵蓋 Gamma / Beta（±180）與指南針（0-360）
+HIST_RANGE = (-360.0, 360.0, 7200)
+
+
+class SeriesStats:
+    """單一數列的統計：數量、極值、平均、標準差、中位數"""
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.hist = Histogram(*HIST_RANGE)
+
+    def add(self, x):
+        self.stats.add(x)
+        self.hist.add(x)
+
+    @property
+    def n(self):
+        return self.stats.n
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+    @property
+    def median(self):
+        # 直方圖對多峰分布（例如左右傾斜混在一起）比 P² 準，成本也較低；
+        # 中位數落在範圍外（非角度數據）時退回平均值
+        value = self.hist.quantile(0.5)
+        return self.stats.mean if value is None else value
+
+
+def print_statistics(series, label):
+    """計算並顯示統計信息"""
+    if series.n == 0:
+        return
+    s = series.stats
+    print(f"\n{label} 統計：")
+    print(f"  數據點數: {s.n}")
+    print(f"  最小值: {s.min:.4f}")
+    print(f"  最大值: {s.max:.4f}")
+    print(f"  平均值: {s.mean:.4f}")
+    print(f"  中位數: {series.median:.4f}")
+    if s.n > 1:
+        print(f"  標準差: {s.stdev:.4f}")
+    print(f"  範圍: {s.range:.4f}")
+
+
+def print_counts(counts, title):
+    print(title)
+    for direction, count in counts.items():
+        print(f"    {direction}: {count} 次")
+
+
+class TiltAnalysis:
+    def __init__(self, sessions=True):
+        self.phases = {}  # 階段名稱 -> SeriesStats（同名階段合併，依出現順序）
+        self.session = SeriesStats() if sessions else None  # 目前這一段階段，end_session() 時清空
+        self.overall = SeriesStats()
+        self.axes = {'alpha': RunningStats(), 'beta': RunningStats(), 'gamma': RunningStats()}
+        self.directions = {}  # 階段名稱 -> Counter
+        self.first = None  # 第一筆樣本的 (raw_data, direction)，用於判斷數據類型
+
+    @property
+    def count(self):
+        return self.overall.n
+
+    def add(self, phase, value, alpha=None, beta=None, gamma=None, direction=None, raw_data=None):
+        if self.first is None:
+            self.first = (raw_data, direction)
+        series = self.phases.get(phase)
+        if series is None:
+            series = self.phases[phase] = SeriesStats()
+        series.add(value)
+        if self.session is not None:
+            self.session.add(value)
+        self.overall.add(value)
+        for name, v in (('alpha', alpha), ('beta', beta), ('gamma', gamma)):
+            if v is not None:
+                self.axes[name].add(v)
+        if direction is not None:
+            self.directions.setdefault(phase, Counter())[direction] += 1
+
+    def end_session(self, label):
+        print_statistics(self.session, label)
+        self.session = SeriesStats()
+
+    def print_report(self):
+        if self.count == 0:
+            return
+        # 顯示每個階段的統計
+        for phase_name, series in self.phases.items():
+            print_statistics(series, phase_name)
+
+        # 整體統計
+        s = self.overall.stats
+        print(f"\n整體統計（所有數據）：")
+        print(f"  總數據點數: {s.n}")
+        print(f"  最小值: {s.min:.4f}")
+        print(f"  最大值: {s.max:.4f}")
+        print(f"  平均值: {s.mean:.4f}")
+        print(f"  中位數: {self.overall.median:.4f}")
+        if s.n > 1:
+            print(f"  標準差: {s.stdev:.4f}")
+        print(f"  範圍: {s.range:.4f}")
+
+        self.print_data_type()
+        self.print_suggestions()
+
+    def print_data_type(self):
+        s = self.overall.stats
+        raw_format, first_direction = self.first
+        print(f"\n📋 數據類型判斷：")
+        if raw_format is not None:
+            # 檢查是否為方向字符串
+            if first_direction is not None:
+                print("  ⚠️ 這是 Gyroscope（陀螺儀）方向字符串數據")
+                print("  💡 問題：IoTtalk 返回的是方向描述，而不是數值")
+                print("  🔧 解決方案：")
+                print("     1. 檢查 IoTtalk Canvas 上的連接")
+                print("     2. 確保連接的是 Smartphone (Gyroscope) 的數值輸出（x1, x2, x3）")
+                print("     3. 而不是方向描述輸出")
+                # 統計各方向出現的頻率
+                total = Counter()
+                for counts in self.directions.values():
+                    total.update(counts)
+                if total:
+                    print_counts(total, "  📊 方向統計（所有階段）：")
+            elif isinstance(raw_format, (list, tuple)) and len(raw_format) >= 3:
+                print("  ✅ 這是 Gyroscope（陀螺儀）數據（[alpha, beta, gamma] 角速度）")
+                print("  💡 建議：使用 Gyroscope 模式，使用 Gamma（繞 Y 軸，roll）控制左右")
+                print(f"  📊 Gamma 範圍: {s.min:.3f} 到 {s.max:.3f}")
+                for name, label in (('alpha', 'Alpha'), ('beta', 'Beta'), ('gamma', 'Gamma')):
+                    axis = self.axes[name]
+                    if axis.n:
+                        print(f"  📊 {label} 範圍: {axis.min:.3f} 到 {axis.max:.3f}")
+            elif isinstance(raw_format, (list, tuple)):
+                print("  ✅ 這是列表格式數據")
+                print(f"  📊 數據長度: {len(raw_format)}")
+                if len(raw_format) > 0:
+                    print(f"  📊 第一個元素: {raw_format[0]}, 類型: {type(raw_format[0])}")
+            else:
+                print("  ✅ 這是單一數值數據")
+        elif 0 <= s.min <= 360 and 0 <= s.max <= 360:
+            print("  ✅ 這是指南針數據（角度 0-360）")
+            print("  💡 建議：使用指南針模式")
+        else:
+            print("  ✅ 這是加速度計或其他單一數值數據")
+            print("  💡 建議：使用加速度計模式")
+
+    def print_suggestions(self):
+        # 分析左右傾斜的數據範圍（特別針對 Gamma 值）
+        phases = self.phases
+        if RIGHT_PHASE in phases and LEFT_PHASE in phases:
+            right = phases[RIGHT_PHASE].stats
+            left = phases[LEFT_PHASE].stats
+            center = phases[CENTER_PHASE].stats if CENTER_PHASE in phases else None
+
+            print(f"\n" + "=" * 60)
+            print(f"🎯 關鍵數值分析（用於 Game.py 設定）")
+            print(f"=" * 60)
+
+            center_avg = center.mean if center else 0
+            center_min = center.min if center else 0
+            center_max = center.max if center else 0
+
+            print(f"\n📊 Gamma 值統計：")
+            print(f"  🎯 中間點（基準值）: {center_avg:.4f}")
+            print(f"     範圍: {center_min:.4f} 到 {center_max:.4f}")
+            print(f"\n  ➡️  極右（向右傾斜到極限）:")
+            print(f"     最大值: {right.max:.4f}")
+            print(f"     最小值: {right.min:.4f}")
+            print(f"     平均值: {right.mean:.4f}")
+            print(f"\n  ⬅️  極左（向左傾斜到極限）:")
+            print(f"     最大值: {left.max:.4f}")
+            print(f"     最小值: {left.min:.4f}")
+            print(f"     平均值: {left.mean:.4f}")
+
+            # 計算建議的參數
+            print(f"\n💡 Game.py 建議設定：")
+            print(f"  baseline = {center_avg:.4f}  # 中間點（基準值）")
+
+            # 計算偏移範圍
+            max_offset = max(abs(right.max - center_avg), abs(right.min - center_avg),
+                             abs(left.max - center_avg), abs(left.min - center_avg))
+            if max_offset > 0:
+                # 計算縮放因子，讓最大偏移映射到 10
+                suggested_scale = 10.0 / max_offset
+                print(f"  scale_factor = {suggested_scale:.4f}  # 縮放因子（約 {suggested_scale:.2f}）")
+                print(f"  dead_zone = {max_offset * 0.1:.2f}  # 死區（建議為最大偏移的 10%）")
+
+            print(f"\n  📝 控制邏輯：")
+            print(f"     offset = gamma_value - {center_avg:.4f}")
+            if right.mean > center_avg:
+                print(f"     offset > 0 → 向右移動")
+                print(f"     offset < 0 → 向左移動")
+            else:
+                print(f"     offset > 0 → 向左移動")
+                print(f"     offset < 0 → 向右移動（可能需要反轉）")
+
+            # 如果使用方向字符串，顯示各階段的方向統計
+            if self.first[1] is not None:
+                if self.directions.get(RIGHT_PHASE):
+                    print_counts(self.directions[RIGHT_PHASE], f"\n  📊 向右傾斜時的方向分布：")
+                if self.directions.get(LEFT_PHASE):
+                    print_counts(self.directions[LEFT_PHASE], f"\n  📊 向左傾斜時的方向分布：")
+        elif "向右傾斜" in phases and "向左傾斜" in phases:
+            # 舊版本兼容
+            right_avg = phases["向右傾斜"].mean
+            left_avg = phases["向左傾斜"].mean
+
+            print(f"\n📐 傾斜方向分析：")
+            print(f"  向右傾斜平均值: {right_avg:.4f}")
+            print(f"  向左傾斜平均值: {left_avg:.4f}")
+
+            if right_avg > left_avg:
+                print(f"  ✅ 向右傾斜的值 > 向左傾斜的值")
+            else:
+                print(f"  ✅ 向右傾斜的值 < 向左傾斜的值")
+            print(f"  💡 如果方向相反，需要反轉邏輯")
+
+
+def phase_at(offset, phases=PHASES):
+    # 依測試時間表找出 offset 秒時所在的階段；超過時間表後回傳 None
+    for name, seconds in phases:
+        if offset < seconds:
+            return name
+        offset -= seconds
+    return None
+
+
+def analyse_recording(path, phases=PHASES):
+    """以同一套串流統計分析 tilt_record 檔案；phases=None 時全部算同一階段"""
+    from tilt_record import TiltPlayback
+    analysis = TiltAnalysis(sessions=False)  # 檔案只印最後的報告
+    with TiltPlayback(path) as playback:
+        for t, alpha, beta, gamma in playback:
+            phase = phase_at(t, phases) if phases else ALL_PHASE
+            if phase is None:
+                break  # 與即時測試相同：時間表結束就停止
+            if math.isnan(alpha) and math.isnan(beta):
+                analysis.add(phase, gamma, raw_data=[gamma])  # 單一數值樣本
+            else:
+                analysis.add(phase, gamma, alpha, beta, gamma, raw_data=[alpha, beta, gamma])
+    return analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyse a recorded tilt session')
+    parser.add_argument('file', help='tilt_record file (.tilt)')
+    parser.add_argument('--no-phases', action='store_true',
+                        help='treat the whole recording as one phase (long captures)')
+    args = parser.parse_args()
+
+    analysis = analyse_recording(args.file, None if args.no_phases else PHASES)
+    print("=" * 60)
+    print("📊 整體統計報告")
+    print("=" * 60)
+    if analysis.count == 0:
+        print("（沒有數據）")
+        return
+    analysis.print_report()
+
+
+if __name__ == '__main__':
+    main()
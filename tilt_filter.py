@@ -0,0 +1,147 @@
+"""
+Pluggable smoothing filters with short-horizon prediction for tilt input.
+
+Every filter takes timestamped samples through update(t, x) and can
+extrapolate to a later time with predict(t), using its own velocity
+estimate. predict() never looks further ahead than max_horizon seconds past
+the newest sample, so stale input is held rather than extrapolated away.
+
+    f = make_filter('one_euro')
+    for t, x in samples: f.update(t, x)
+    value = f.predict(now + lead)
+"""
+
+import math
+
+DEFAULT_MAX_HORIZON = 0.15
+MIN_DT = 0.005  # samples often arrive in bursts; floor dt so derivatives stay sane
+
+
+class TiltFilter:
+    # Pass-through filter; also the base class for the others
+    def __init__(self, max_horizon=DEFAULT_MAX_HORIZON):
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self.t = None
+        self.x = 0.0
+        self.v = 0.0  # estimated rate of change per second
+
+    def update(self, t, x):
+        self.t, self.x = t, x  # no velocity estimate: predict() holds the sample
+        return self.x
+
+    def predict(self, t):
+        if self.t is None:
+            return self.x
+        horizon = t - self.t
+        if horizon <= 0:
+            return self.x
+        if horizon > self.max_horizon:
+            return self.x  # stale: hold the last estimate
+        return self.x + self.v * horizon
+
+
+class EMAFilter(TiltFilter):
+    # Exponential moving average with a time constant (s), so irregular
+    # sample spacing is weighted correctly
+    def __init__(self, tau=0.06, max_horizon=DEFAULT_MAX_HORIZON):
+        self.tau = tau
+        super().__init__(max_horizon)
+
+    def update(self, t, x):
+        if self.t is None:
+            self.t, self.x = t, x
+            return x
+        dt = max(t - self.t, MIN_DT)
+        a = 1.0 - math.exp(-dt / self.tau)
+        new_x = self.x + a * (x - self.x)
+        self.v += a * ((new_x - self.x) / dt - self.v)
+        self.t, self.x = t, new_x
+        return new_x
+
+
+def _smoothing(dt, cutoff):
+    r = 2 * math.pi * cutoff * dt
+    return r / (r + 1)
+
+
+class OneEuroFilter(TiltFilter):
+    # Casiez et al. 1€ filter: low cutoff when still (less jitter), cutoff
+    # rises with speed (less lag)
+    def __init__(self, min_cutoff=1.0, beta=0.5, d_cutoff=1.0, max_horizon=DEFAULT_MAX_HORIZON):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        super().__init__(max_horizon)
+
+    def update(self, t, x):
+        if self.t is None:
+            self.t, self.x = t, x
+            return x
+        dt = max(t - self.t, MIN_DT)
+        a_d = _smoothing(dt, self.d_cutoff)
+        self.dx += a_d * ((x - self.x) / dt - self.dx)
+        cutoff = self.min_cutoff + self.beta * abs(self.dx)
+        a = _smoothing(dt, cutoff)
+        new_x = self.x + a * (x - self.x)
+        # Prediction uses the slope of the filtered output, not the raw one
+        self.v += a_d * ((new_x - self.x) / dt - self.v)
+        self.t, self.x = t, new_x
+        return new_x
+
+    def reset(self):
+        super().reset()
+        self.dx = 0.0  # filtered raw derivative, drives the adaptive cutoff
+
+
+class KalmanFilter(TiltFilter):
+    # Constant-velocity Kalman filter on (position, velocity)
+    def __init__(self, process_noise=100.0, measurement_noise=0.5, max_horizon=DEFAULT_MAX_HORIZON):
+        self.q = process_noise  # acceleration noise spectral density
+        self.r = measurement_noise  # measurement variance
+        super().__init__(max_horizon)
+
+    def reset(self):
+        super().reset()
+        self.p = [[1.0, 0.0], [0.0, 1.0]]
+
+    def update(self, t, x):
+        if self.t is None:
+            self.t, self.x = t, x
+            return x
+        dt = max(t - self.t, MIN_DT)
+        (p00, p01), (p10, p11) = self.p
+        # Predict
+        px = self.x + self.v * dt
+        q = self.q
+        p00 = p00 + dt * (p10 + p01) + dt * dt * p11 + q * dt ** 3 / 3
+        p01 = p01 + dt * p11 + q * dt ** 2 / 2
+        p10 = p10 + dt * p11 + q * dt ** 2 / 2
+        p11 = p11 + q * dt
+        # Update
+        s = p00 + self.r
+        k0, k1 = p00 / s, p10 / s
+        y = x - px
+        self.x = px + k0 * y
+        self.v = self.v + k1 * y
+        self.p = [[(1 - k0) * p00, (1 - k0) * p01],
+                  [p10 - k1 * p00, p11 - k1 * p01]]
+        self.t = t
+        return self.x
+
+
+FILTERS = {
+    'none': TiltFilter,
+    'ema': EMAFilter,
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter,
+}
+
+
+def make_filter(name, **kwargs):
+    try:
+        return FILTERS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f'unknown tilt filter: {name} (choose from {", ".join(FILTERS)})')
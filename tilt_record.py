@@ -0,0 +1,158 @@
+"""
+Compact binary record/replay of gyroscope (alpha, beta, gamma) samples.
+
+File layout (little-endian):
+
+    header  8s magic b'SKYTILT1', d start time (UNIX seconds)
+    record  d offset from start (s), f alpha, f beta, f gamma
+
+Missing axes (e.g. a single-value sample) are stored as NaN. Records are
+fixed width, so playback memory-maps the file and reads samples in place
+instead of loading the session into RAM.
+"""
+
+import math
+import mmap
+import struct
+import threading
+import time
+
+MAGIC = b'SKYTILT1'
+HEADER = struct.Struct('<8sd')
+RECORD = struct.Struct('<dfff')
+NAN = float('nan')
+
+
+def split_sample(data):
+    """Turn a Dummy_Control payload into (alpha, beta, gamma); None if unusable."""
+    if isinstance(data, (list, tuple)) and len(data) >= 1 and isinstance(data[0], (list, tuple)):
+        data = data[0]  # [[alpha, beta, gamma]]
+    if not isinstance(data, (list, tuple)):
+        data = [data]
+    try:
+        if len(data) >= 3:
+            return float(data[0]), float(data[1]), float(data[2])
+        if len(data) >= 1:
+            return NAN, NAN, float(data[0])  # single value is treated as gamma
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def to_payload(alpha, beta, gamma):
+    """Inverse of split_sample: the payload shape DAN.pull would return."""
+    if math.isnan(alpha) and math.isnan(beta):
+        return [gamma]
+    return [[alpha, beta, gamma]]
+
+
+class TiltRecorder:
+    def __init__(self, path, flush_every=50, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.start = clock()
+        self.flush_every = flush_every
+        self.count = 0
+        self.lock = threading.Lock()  # MQTT and polling threads may both record
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, self.start))
+
+    def write(self, alpha, beta, gamma, t=None):
+        t = self.clock() if t is None else t
+        with self.lock:
+            if self.file.closed:
+                return  # late sample from a listener thread after close()
+            self.file.write(RECORD.pack(t - self.start, alpha, beta, gamma))
+            self.count += 1
+            if self.count % self.flush_every == 0:
+                self.file.flush()
+
+    def observe(self, feature_name, data):
+        """DAN.pull_observer-compatible hook: record one pulled payload."""
+        sample = split_sample(data)
+        if sample is not None:
+            self.write(*sample)
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TiltPlayback:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.start = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a tilt recording')
+        self.count = (len(self.map) - HEADER.size) // RECORD.size
+        self.cursor = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return RECORD.unpack_from(self.map, HEADER.size + i * RECORD.size)
+
+    def __iter__(self):
+        end = HEADER.size + self.count * RECORD.size
+        return RECORD.iter_unpack(memoryview(self.map)[HEADER.size:end])
+
+    @property
+    def duration(self):
+        return self[self.count - 1][0] if self.count else 0.0
+
+    def sample_at(self, t):
+        """Latest sample with offset <= t. The cursor only moves forward,
+        so sequential lookups are O(1) amortised."""
+        if self.count == 0:
+            return None
+        if self.cursor and self[self.cursor][0] > t:
+            self.cursor = 0  # time went backwards: rewind
+        while self.cursor + 1 < self.count and self[self.cursor + 1][0] <= t:
+            self.cursor += 1
+        sample = self[self.cursor]
+        return sample if sample[0] <= t else None
+
+    def play(self, callback, speed=1.0, loop=False, stop=None):
+        """Call callback(payload) for every sample at the recorded timing.
+
+        speed scales playback (2.0 = twice as fast); speed=None plays as fast
+        as possible. stop is an optional threading.Event that ends playback.
+        An empty recording returns at once, even with loop=True.
+        """
+        if len(self) == 0:
+            return
+        while True:
+            begin = time.perf_counter()
+            for t, alpha, beta, gamma in self:
+                if stop is not None and stop.is_set():
+                    return
+                if speed:
+                    delay = begin + t / speed - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                callback(to_payload(alpha, beta, gamma))
+            if not loop:
+                return
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()